@@ -7,10 +7,11 @@ import random
 import secrets
 import warnings
 from argparse import Namespace
+from array import array
 from collections import Counter, deque, defaultdict
-from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, MutableSequence, Set
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, MutableMapping, MutableSequence, Set
 from enum import IntEnum, IntFlag
-from typing import (AbstractSet, Any, ClassVar, Dict, List, Literal, NamedTuple,
+from typing import (AbstractSet, Any, ClassVar, Dict, FrozenSet, List, Literal, NamedTuple,
                     Optional, Protocol, Tuple, Union, TYPE_CHECKING, overload)
 import dataclasses
 
@@ -102,6 +103,8 @@ class MultiWorld():
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
+    profiler: Optional[Utils.GenerationProfiler] = None
+    """Records how long generation stages take when profiling generation, see Main.main."""
 
     class AttributeProxy():
         def __init__(self, rule):
@@ -592,13 +595,10 @@ class MultiWorld():
         """
         state = CollectionState(self)
         locations = set(self.get_filled_locations())
+        search = SphereSearch(state, locations)
 
         while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = search.find(locations)
             yield sphere
             if not sphere:
                 if locations:
@@ -606,7 +606,7 @@ class MultiWorld():
                 break
 
             for location in sphere:
-                state.collect(location.item, True, location)
+                search.collect(location)
             locations -= sphere
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
@@ -625,23 +625,16 @@ class MultiWorld():
             else:
                 events.add(location)
 
-        while locations:
-            sphere: Set[Location] = set()
+        search = SphereSearch(state, locations | events)
 
+        while locations:
             # cull events out
-            done_events: Set[Union[Location, None]] = {None}
+            done_events = search.sweep(events)
             while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
                 events -= done_events
+                done_events = search.sweep(events)
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
+            sphere = search.find(locations)
             yield sphere
             if not sphere:
                 if locations:
@@ -649,7 +642,7 @@ class MultiWorld():
                 break
 
             for location in sphere:
-                state.collect(location.item, True, location)
+                search.collect(location)
             locations -= sphere
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
@@ -719,8 +712,95 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class ItemIndex:
+    """Dense integer indices of the item names of a world type, shared by all ItemCounts of that world type."""
+    indices: Dict[str, int]
+    names: List[str]
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.indices = {}
+        self.names = []
+        for name in names:
+            self.get_index(name)
+
+    def get_index(self, name: str) -> int:
+        """Returns the index of an item name, assigning the next free index to names not seen before."""
+        index = self.indices.get(name)
+        if index is None:
+            index = self.indices[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+
+class ItemCounts(MutableMapping[str, int]):
+    """
+    Counter replacement for CollectionState.prog_items of worlds with compact_item_counts.
+    Counts are stored in an array ordered by an ItemIndex, so copying is a buffer copy and looking up an item by
+    index, see ItemIndex.get_index, is an array load. Missing items count as 0 and items with a count of 0 are skipped
+    on iteration, like Counter.
+    """
+    __slots__ = ("item_index", "counts")
+
+    item_index: ItemIndex
+    counts: array[int]
+
+    def __init__(self, item_index: ItemIndex) -> None:
+        self.item_index = item_index
+        self.counts = array("l", bytes(array("l").itemsize * len(item_index.names)))
+
+    def count_index(self, index: int) -> int:
+        """Returns the count of the item at an index obtained from ItemIndex.get_index."""
+        counts = self.counts
+        return counts[index] if index < len(counts) else 0
+
+    def __getitem__(self, item: str) -> int:
+        index = self.item_index.indices.get(item)
+        if index is None:
+            return 0
+        counts = self.counts
+        return counts[index] if index < len(counts) else 0
+
+    def __setitem__(self, item: str, count: int) -> None:
+        index = self.item_index.get_index(item)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend(bytes(counts.itemsize * (len(self.item_index.names) - len(counts))))
+        counts[index] = count
+
+    def __delitem__(self, item: str) -> None:
+        # like Counter, deleting a missing item is not an error
+        index = self.item_index.indices.get(item)
+        if index is not None and index < len(self.counts):
+            self.counts[index] = 0
+
+    def __contains__(self, item: object) -> bool:
+        return isinstance(item, str) and self[item] != 0
+
+    def __iter__(self) -> Iterator[str]:
+        names = self.item_index.names
+        return (names[index] for index, count in enumerate(self.counts) if count)
+
+    def __len__(self) -> int:
+        return len(self.counts) - self.counts.count(0)
+
+    def get(self, item: str, default: Optional[int] = None) -> Optional[int]:
+        return self[item] or default
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())})"
+
+    def copy(self) -> ItemCounts:
+        ret = ItemCounts.__new__(ItemCounts)
+        ret.item_index = self.item_index
+        ret.counts = self.counts[:]
+        return ret
+
+    def total(self) -> int:
+        return sum(self.counts)
+
+
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    prog_items: Dict[int, Union[Counter[str], ItemCounts]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
@@ -728,13 +808,19 @@ class CollectionState():
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
+    dirty_items: Dict[int, Optional[Set[str]]]
+    """item names whose counts changed since the last region update of each player, None forces a full update"""
+    shared_players: Set[int]
+    """players whose prog_items, reachable_regions, blocked_connections and dirty_items are shared with a copy"""
     allow_partial_entrances: bool
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
         assert parent.worlds, "CollectionState created without worlds initialized in parent"
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.prog_items = {player: Counter() if parent.worlds[player].item_index is None
+                           else ItemCounts(parent.worlds[player].item_index)
+                           for player in parent.get_all_ids()}
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
@@ -742,6 +828,8 @@ class CollectionState():
         self.path = {}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
+        self.dirty_items = {player: None for player in parent.get_all_ids()}
+        self.shared_players = set()
         self.allow_partial_entrances = allow_partial_entrances
         for function in self.additional_init_functions:
             function(self, parent)
@@ -751,9 +839,21 @@ class CollectionState():
 
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        if player in self.shared_players:
+            self.unshare(player)
         world: AutoWorld.World = self.multiworld.worlds[player]
+        if self.multiworld.profiler:
+            self.multiworld.profiler.count("update_reachable_regions", world.game)
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        dirty_items = self.dirty_items[player]
+        self.dirty_items[player] = set()
+        if dirty_items and world.incremental_region_reachability:
+            # only retry connections whose access rule can have changed with the items collected since the last update
+            queue = deque(connection for connection in self.blocked_connections[player]
+                          if connection.connected_region is None
+                          or not connection.item_dependencies_disjoint(dirty_items))
+        else:
+            queue = deque(self.blocked_connections[player])
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
@@ -797,6 +897,7 @@ class CollectionState():
     def _update_reachable_regions_auto_indirect_conditions(self, player: int, queue: deque[Entrance]):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
+        incremental = self.multiworld.worlds[player].incremental_region_reachability
         new_connection: bool = True
         # run BFS on all connections, and keep track of those blocked by missing items
         while new_connection:
@@ -818,23 +919,49 @@ class CollectionState():
                     new_connection = True
                     self.multiworld.worlds[player].reached_region(self, new_region)
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
-            queue.extend(blocked_connections)
+            if incremental:
+                # connections that only depend on items can't have been unblocked by newly reached regions
+                queue.extend(connection for connection in blocked_connections
+                             if connection.get_item_dependencies() is None)
+            else:
+                queue.extend(blocked_connections)
 
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        # The per-player structures are shared with the copy until either state mutates them, see unshare.
+        # This way, copying costs time proportional to the players that actually get touched afterward.
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
+        ret.prog_items = self.prog_items.copy()
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        ret.stale = self.stale.copy()
+        ret.dirty_items = self.dirty_items.copy()
+        self.shared_players = set(self.prog_items)
+        ret.shared_players = set(self.prog_items)
         ret.allow_partial_entrances = self.allow_partial_entrances
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
 
+    def unshare(self, player: int) -> None:
+        """
+        Gives this state its own copy of the player's structures that are shared with copies of this state.
+        Mutations through collect, remove and the *_item methods already do this, but anything mutating prog_items,
+        reachable_regions or blocked_connections of a player directly on a copied state has to call this first.
+        """
+        self.shared_players.discard(player)
+        self.prog_items[player] = self.prog_items[player].copy()
+        self.reachable_regions[player] = self.reachable_regions[player].copy()
+        self.blocked_connections[player] = self.blocked_connections[player].copy()
+        dirty_items = self.dirty_items[player]
+        if dirty_items is not None:
+            self.dirty_items[player] = dirty_items.copy()
+
     def can_reach(self,
                   spot: Union[Location, Entrance, Region, str],
                   resolution_hint: Optional[str] = None,
@@ -959,6 +1086,8 @@ class CollectionState():
         :param checked_locations: Optional override of locations to filter out from the locations argument, defaults to
         self.advancements when None.
         """
+        if self.multiworld.profiler:
+            self.multiworld.profiler.count("sweep_for_advancements")
         if checked_locations is None:
             checked_locations = self.advancements
 
@@ -1118,6 +1247,8 @@ class CollectionState():
         if location:
             self.locations_checked.add(location)
 
+        if item.player in self.shared_players:
+            self.unshare(item.player)
         changed = self.multiworld.worlds[item.player].collect(self, item)
 
         self.stale[item.player] = True
@@ -1136,15 +1267,23 @@ class CollectionState():
         :param count: How many of the item to add.
         """
         assert count > 0
+        if player in self.shared_players:
+            self.unshare(player)
         self.prog_items[player][item] += count
+        dirty_items = self.dirty_items[player]
+        if dirty_items is not None:
+            dirty_items.add(item)
 
     def remove(self, item: Item):
+        if item.player in self.shared_players:
+            self.unshare(item.player)
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
             self.stale[item.player] = True
+            self.dirty_items[item.player] = None
 
     def remove_item(self, item: str, player: int, count: int = 1) -> None:
         """
@@ -1155,9 +1294,14 @@ class CollectionState():
         :param count: How many of the item to remove.
         """
         assert count > 0
+        if player in self.shared_players:
+            self.unshare(player)
         self.prog_items[player][item] -= count
         if self.prog_items[player][item] < 1:
             del (self.prog_items[player][item])
+        dirty_items = self.dirty_items[player]
+        if dirty_items is not None:
+            dirty_items.add(item)
 
     def set_item(self, item: str, player: int, count: int) -> None:
         """
@@ -1168,16 +1312,171 @@ class CollectionState():
         :param count: How many of the item to now have.
         """
         assert count >= 0
+        if player in self.shared_players:
+            self.unshare(player)
         if count == 0:
             del (self.prog_items[player][item])
         else:
             self.prog_items[player][item] = count
+        dirty_items = self.dirty_items[player]
+        if dirty_items is not None:
+            dirty_items.add(item)
 
 
 CollectionRule = Callable[[CollectionState], bool]
 DEFAULT_COLLECTION_RULE: CollectionRule = staticmethod(lambda state: True)
 
 
+def _get_rule_item_dependencies(rule: CollectionRule) -> Optional[FrozenSet[str]]:
+    """Returns the item names of the rule's player that can change the result of the rule, or None if that is unknown."""
+    if rule is Location.access_rule:
+        return frozenset()
+    from rule_builder.rules import Rule
+    if isinstance(rule, Rule.Resolved) and not rule.force_recalculate and rule.item_dependencies_known() and not (
+            rule.region_dependencies() or rule.location_dependencies() or rule.entrance_dependencies()):
+        return frozenset(rule.item_dependencies())
+    return None
+
+
+class SphereSearch:
+    """
+    Finds reachable locations among pending ones while items are collected into a state, sphere by sphere.
+    A location that was found unreachable is only checked again once its parent region became reachable or an item it
+    depends on changed, see Location.get_item_dependencies. Locations with unknown dependencies are checked every time
+    once their parent region is reachable.
+    """
+    state: CollectionState
+    pending: Set[Location]
+    dirty: Set[Location]
+    unindexed: Set[Location]
+    by_region: Dict[int, Dict[Region, List[Location]]]
+    unreached_regions: Dict[int, Dict[Region, List[Location]]]
+    by_item: Dict[int, Dict[str, List[Location]]]
+    reached_regions: Dict[int, Set[Region]]
+    item_counts: Dict[int, Dict[str, int]]
+    changed_players: Set[int]
+
+    def __init__(self, state: CollectionState, locations: Iterable[Location]) -> None:
+        self.state = state
+        self.pending = set(locations)
+        self.dirty = set()
+        self.unindexed = set()
+        self.by_region = defaultdict(lambda: defaultdict(list))
+        self.unreached_regions = defaultdict(lambda: defaultdict(list))
+        self.by_item = defaultdict(lambda: defaultdict(list))
+        for location in self.pending:
+            dependencies = location.get_item_dependencies()
+            if dependencies is None:
+                if type(location).can_reach is Location.can_reach:
+                    # unreachable as long as the parent region is
+                    self.unreached_regions[location.player][location.parent_region].append(location)
+                else:
+                    self.unindexed.add(location)
+                continue
+            self.dirty.add(location)
+            self.by_region[location.player][location.parent_region].append(location)
+            for item_name in dependencies:
+                self.by_item[location.player][item_name].append(location)
+        self.reached_regions = {}
+        for player in self.by_region:
+            if state.stale[player]:
+                state.update_reachable_regions(player)
+            self.reached_regions[player] = set(state.reachable_regions[player])
+        self.item_counts = {player: {item_name: state.prog_items[player][item_name] for item_name in by_item}
+                            for player, by_item in self.by_item.items()}
+        # checks which parent regions of unindexed locations are already reachable
+        self.changed_players = set(self.unreached_regions)
+
+    def _refresh(self) -> None:
+        state = self.state
+        dirty = self.dirty
+        for player in self.changed_players:
+            # only players owning pending locations with known dependencies are tracked
+            reached_regions = self.reached_regions.get(player)
+            if reached_regions is not None:
+                if state.stale[player]:
+                    state.update_reachable_regions(player)
+                new_regions = state.reachable_regions[player] - reached_regions
+                if new_regions:
+                    reached_regions |= new_regions
+                    by_region = self.by_region[player]
+                    for region in new_regions:
+                        if region in by_region:
+                            dirty.update(by_region[region])
+            unreached_regions = self.unreached_regions.get(player)
+            if unreached_regions:
+                # Region.can_reach is used instead of reachable_regions, as some worlds override it
+                for region in [region for region in unreached_regions if region.can_reach(state)]:
+                    self.unindexed.update(self.pending.intersection(unreached_regions.pop(region)))
+            item_counts = self.item_counts.get(player)
+            if item_counts is not None:
+                prog_items = state.prog_items[player]
+                for item_name, locations in self.by_item[player].items():
+                    count = prog_items[item_name]
+                    if item_counts.get(item_name, 0) != count:
+                        item_counts[item_name] = count
+                        dirty.update(locations)
+        self.changed_players.clear()
+
+    def _get_candidates(self, locations: Set[Location]) -> Set[Location]:
+        self._refresh()
+        if len(self.unindexed) == len(self.pending):
+            # nothing to skip
+            return locations
+        candidates = self.dirty & locations
+        self.dirty -= candidates
+        if self.unindexed:
+            candidates |= self.unindexed & locations
+        return candidates
+
+    def find(self, locations: Set[Location]) -> Set[Location]:
+        """Returns the reachable locations out of the pending locations given, which all have to be pending."""
+        state = self.state
+        return {location for location in self._get_candidates(locations) if location.can_reach(state)}
+
+    def sweep(self, locations: Set[Location]) -> Set[Location]:
+        """
+        Collects the reachable locations out of the pending locations given, which all have to be pending.
+        Each item is collected as soon as its location is found, so locations checked afterward can already use it.
+        """
+        state = self.state
+        collected: Set[Location] = set()
+        for location in self._get_candidates(locations):
+            if location.can_reach(state):
+                self.collect(location)
+                collected.add(location)
+        return collected
+
+    def collect(self, location: Location) -> None:
+        """Collects a location's item into the state, no longer keeping track of the location if it was pending."""
+        assert location.item, f"called collect on a Location \"{location}\" with no item"
+        self.state.collect(location.item, True, location)
+        self.changed_players.add(location.item.player)
+        self.remove(location)
+
+    def remove(self, location: Location) -> None:
+        """Stops keeping track of a pending location without collecting its item."""
+        self.pending.discard(location)
+        self.unindexed.discard(location)
+        self.dirty.discard(location)
+
+    def copy(self, state: CollectionState) -> SphereSearch:
+        """Returns a search continuing from this one, for a copy of this search's state."""
+        ret = SphereSearch.__new__(SphereSearch)
+        ret.state = state
+        ret.pending = self.pending.copy()
+        ret.dirty = self.dirty.copy()
+        ret.unindexed = self.unindexed.copy()
+        # the indexes are never changed after creation
+        ret.by_region = self.by_region
+        ret.by_item = self.by_item
+        ret.reached_regions = {player: regions.copy() for player, regions in self.reached_regions.items()}
+        ret.item_counts = {player: item_counts.copy() for player, item_counts in self.item_counts.items()}
+        ret.unreached_regions = {player: regions.copy() for player, regions in self.unreached_regions.items()}
+        ret.changed_players = self.changed_players.copy()
+        return ret
+
+
 class EntranceType(IntEnum):
     ONE_WAY = 1
     TWO_WAY = 2
@@ -1185,6 +1484,10 @@ class EntranceType(IntEnum):
 
 class Entrance:
     access_rule: CollectionRule = DEFAULT_COLLECTION_RULE
+    item_dependencies: Optional[AbstractSet[str]] = None
+    """Names of all items access_rule depends on, if it depends on nothing else. Leave as None for rules that also
+    check anything else, e.g. regions. Rule builder rules provide this automatically."""
+    _resolved_item_dependencies: Tuple[Optional[CollectionRule], Optional[AbstractSet[str]]] = (None, None)
     hide_path: bool = False
     player: int
     name: str
@@ -1210,6 +1513,22 @@ class Entrance:
 
         return False
 
+    def get_item_dependencies(self) -> Optional[AbstractSet[str]]:
+        """Returns the item names that can change the result of access_rule, or None if that is unknown."""
+        if self.item_dependencies is not None:
+            return self.item_dependencies
+        rule = self.access_rule
+        cached_rule, dependencies = self._resolved_item_dependencies
+        if cached_rule is not rule:
+            dependencies = _get_rule_item_dependencies(rule)
+            self._resolved_item_dependencies = (rule, dependencies)
+        return dependencies
+
+    def item_dependencies_disjoint(self, item_names: AbstractSet[str]) -> bool:
+        """Returns True if access_rule is known to not depend on any of the item names."""
+        dependencies = self.get_item_dependencies()
+        return dependencies is not None and dependencies.isdisjoint(item_names)
+
     def connect(self, region: Region) -> None:
         self.connected_region = region
         region.entrances.append(self)
@@ -1484,6 +1803,10 @@ class Location:
     progress_type: LocationProgressType = LocationProgressType.DEFAULT
     always_allow: Callable[[CollectionState, Item], bool] = staticmethod(lambda state, item: False)
     access_rule: CollectionRule = DEFAULT_COLLECTION_RULE
+    item_dependencies: Optional[AbstractSet[str]] = None
+    """Names of all items access_rule depends on, if it depends on nothing else. Leave as None for rules that also
+    check anything else, e.g. regions. Rule builder rules provide this automatically."""
+    _resolved_item_dependencies: Tuple[Optional[CollectionRule], Optional[AbstractSet[str]]] = (None, None)
     item_rule: Callable[[Item], bool] = staticmethod(lambda item: True)
     item: Optional[Item] = None
 
@@ -1508,6 +1831,17 @@ class Location:
         assert self.parent_region, f"called can_reach on a Location \"{self}\" with no parent_region"
         return self.parent_region.can_reach(state) and self.access_rule(state)
 
+    def get_item_dependencies(self) -> Optional[AbstractSet[str]]:
+        """Returns the item names that can change the result of access_rule, or None if that is unknown."""
+        if self.item_dependencies is not None:
+            return self.item_dependencies
+        rule = self.access_rule
+        cached_rule, dependencies = self._resolved_item_dependencies
+        if cached_rule is not rule:
+            dependencies = _get_rule_item_dependencies(rule)
+            self._resolved_item_dependencies = (rule, dependencies)
+        return dependencies
+
     def place_locked_item(self, item: Item):
         if self.item:
             raise Exception(f"Location {self} already filled.")
@@ -1741,18 +2075,44 @@ class Spoiler:
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
         required_locations = {location for sphere in collection_spheres for location in sphere}
+
+        def is_beatable_without(sphere_state: Optional[CollectionState], locations: List[Location]) -> bool:
+            # we remove the locations from required_locations to sweep from, and check if the game is still beatable
+            required_locations.difference_update(locations)
+            beatable = multiworld.can_beat_game(sphere_state, required_locations)
+            required_locations.update(locations)
+            return beatable
+
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
             to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the location from required_locations to sweep from, and check if the game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                required_locations.remove(location)
-                if multiworld.can_beat_game(state_cache[num], required_locations):
-                    to_delete.add(location)
+            # Removing locations one at a time in order would check each location once. Instead, batches that grow
+            # while locations turn out to be unneeded are checked at once. If a batch is needed, a binary search finds
+            # its first needed location, so exactly the locations that one at a time would remove are removed.
+            candidates = list(sphere)
+            index = 0
+            batch_size = 1
+            while index < len(candidates):
+                batch = candidates[index:index + batch_size]
+                logging.debug('Checking if %i items starting with %s (Player %d) are required to beat the game.',
+                              len(batch), batch[0].item.name, batch[0].item.player)
+                if is_beatable_without(state_cache[num], batch):
+                    deletable = len(batch)
+                    index += deletable
+                    batch_size = deletable * 2
                 else:
-                    # still required, got to keep it around
-                    required_locations.add(location)
+                    deletable = 0
+                    needed = len(batch)
+                    while needed - deletable > 1:
+                        middle = (deletable + needed) // 2
+                        if is_beatable_without(state_cache[num], batch[:middle]):
+                            deletable = middle
+                        else:
+                            needed = middle
+                    # batch[deletable] is still required, got to keep it around
+                    index += deletable + 1
+                    batch_size = max(1, len(batch) // 2)
+                to_delete.update(batch[:deletable])
+                required_locations.difference_update(batch[:deletable])
 
             # cull entries in spheres for spoiler walkthrough at end
             sphere -= to_delete
@@ -4,7 +4,8 @@ import logging
 import typing
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock
+from BaseClasses import (CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock,
+                         SphereSearch)
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -33,6 +34,11 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+def _has_default_fill_rules(location: Location) -> bool:
+    """Whether location.can_fill can only succeed for a reachable location, when checking access."""
+    return type(location).can_fill is Location.can_fill and location.always_allow is Location.always_allow
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -63,6 +69,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     total = min(len(item_pool), len(locations))
     placed = 0
 
+    # state of base_state with most of the remaining items, to sweep each round's maximum_exploration_state from
+    checkpoint_state: typing.Optional[CollectionState] = None
+    checkpoint_lengths: typing.Dict[int, int] = {}
+    checkpoint_unplaced = 0
+    checkpoint_interval = 8
+
     while any(reachable_items.values()) and locations:
         if one_item_per_player:
             # grab one item per player
@@ -82,11 +94,26 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     del item_pool[-p]
                     break
 
+        sweep_locations = multiworld.get_filled_locations(item.player) if single_player_placement else None
+        if checkpoint_state is None or any(len(reachable_items[player]) < length
+                                           for player, length in checkpoint_lengths.items()):
+            # Sweep a checkpoint that leaves out the items of the next `checkpoint_interval` placement rounds. Only
+            # items get removed from the pool until a swap happens, so the checkpoint stays a subset of every
+            # exploration state until then, and each round only has to collect and sweep the difference.
+            checkpoint_lengths = {player: max(0, len(items) - checkpoint_interval)
+                                  for player, items in reachable_items.items()}
+            checkpoint_unplaced = len(unplaced_items)
+            checkpoint_state = sweep_from_pool(
+                base_state, [item for player, items in reachable_items.items()
+                             for item in itertools.islice(items, checkpoint_lengths[player])] + unplaced_items,
+                sweep_locations)
         maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+            checkpoint_state, [item for player, items in reachable_items.items()
+                               for item in itertools.islice(items, checkpoint_lengths[player], None)]
+            + unplaced_items[checkpoint_unplaced:], sweep_locations)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        reachable_locations: typing.Dict[Location, bool] = {}
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
@@ -106,12 +133,21 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 perform_access_check = True
 
             for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
+                if single_player_placement and location.player != item_to_place.player:
+                    continue
+                if perform_access_check and _has_default_fill_rules(location):
+                    # reachability does not depend on the item, so check it only once per maximum_exploration_state
+                    reachable = reachable_locations.get(location)
+                    if reachable is None:
+                        reachable = reachable_locations[location] = location.can_reach(maximum_exploration_state)
+                    if not reachable or not location.can_fill(maximum_exploration_state, item_to_place, False):
+                        continue
+                elif not location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
+                    continue
+                # popping by index is faster than removing by content,
+                spot_to_fill = locations.pop(i)
+                # skipping a scan for the element
+                break
 
             else:
                 # we filled all reachable spots.
@@ -180,6 +216,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                             reachable_items[placed_item.player].appendleft(
                                 placed_item)
                             item_pool.append(placed_item)
+                            # placed_item is no longer at its location, so later states may be missing what it reached
+                            checkpoint_state = None
 
                             # cleanup at the end to hopefully get better errors
                             cleanup_required = True
@@ -750,6 +788,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         state: CollectionState = CollectionState(multiworld)
         checked_locations: typing.Set[Location] = set()
         unchecked_locations: typing.Set[Location] = set(multiworld.get_locations())
+        # only rechecks unchecked locations that could have become reachable since the last time they were checked
+        search = SphereSearch(state, unchecked_locations)
 
         total_locations_count: typing.Counter[int] = Counter(
             location.player
@@ -768,11 +808,19 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        checkpoint_interval = 8
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
             return {loc for loc in locations if sphere_state.can_reach(loc)}
 
+        def take_sphere_locations(sphere_search: SphereSearch,
+                                  locations: typing.Set[Location]) -> typing.Set[Location]:
+            sphere = sphere_search.find(locations)
+            for location in sphere:
+                sphere_search.remove(location)
+            return sphere
+
         def item_percentage(player: int, num: int) -> float:
             return num / total_locations_count[player]
 
@@ -784,7 +832,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            sphere_locations = take_sphere_locations(search, unchecked_locations)
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -815,6 +863,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 }
                 if balancing_players:
                     balancing_state = state.copy()
+                    balancing_search = search.copy(balancing_state)
                     balancing_unchecked_locations = unchecked_locations.copy()
                     balancing_reachables = reachable_locations_count.copy()
                     balancing_sphere = sphere_locations.copy()
@@ -823,7 +872,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
                             if location.advancement:
-                                balancing_state.collect(location.item, True, location)
+                                balancing_search.collect(location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -832,7 +881,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        balancing_sphere = take_sphere_locations(balancing_search, balancing_unchecked_locations)
                         for location in balancing_sphere:
                             balancing_unchecked_locations.remove(location)
                             if not location.locked:
@@ -850,30 +899,46 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         if l not in balancing_unchecked_locations:
                             unlocked_locations[l.player].add(l)
                     items_to_replace: typing.List[Location] = []
+                    balancing_beaten = multiworld.has_beaten_game(balancing_state)
                     for player in balancing_players:
                         locations_to_test = unlocked_locations[player]
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         multiworld.random.shuffle(items_to_test)
+                        # Each test collects the items still to test and the ones already kept for replacement, which
+                        # only ever loses the tested item. So the tests share a swept checkpoint that leaves out the
+                        # next few items to test and the later replacements, and only sweep the difference from it.
+                        player_items_to_replace: typing.List[Location] = []
+                        checkpoint_state: typing.Optional[CollectionState] = None
+                        checkpoint_length = 0
+                        checkpoint_replaced = 0
                         while items_to_test:
                             testing = items_to_test.pop()
-                            reducing_state = state.copy()
-                            for location in itertools.chain((
-                                    l for l in items_to_replace
-                                    if l.item.player == player
-                            ), items_to_test):
+                            if checkpoint_state is None or len(items_to_test) < checkpoint_length:
+                                checkpoint_length = max(0, len(items_to_test) - checkpoint_interval)
+                                checkpoint_replaced = len(player_items_to_replace)
+                                checkpoint_state = state.copy()
+                                for location in itertools.chain(player_items_to_replace,
+                                                                itertools.islice(items_to_test, checkpoint_length)):
+                                    checkpoint_state.collect(location.item, True, location)
+                                checkpoint_state.sweep_for_advancements(locations=locations_to_test)
+                            reducing_state = checkpoint_state.copy()
+                            for location in itertools.chain(
+                                    itertools.islice(player_items_to_replace, checkpoint_replaced, None),
+                                    itertools.islice(items_to_test, checkpoint_length, None)):
                                 reducing_state.collect(location.item, True, location)
 
                             reducing_state.sweep_for_advancements(locations=locations_to_test)
 
-                            if multiworld.has_beaten_game(balancing_state):
+                            if balancing_beaten:
                                 if not multiworld.has_beaten_game(reducing_state):
-                                    items_to_replace.append(testing)
+                                    player_items_to_replace.append(testing)
                             else:
                                 reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
                                 p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
                                 if p < threshold_percentages[player]:
-                                    items_to_replace.append(testing)
+                                    player_items_to_replace.append(testing)
+                        items_to_replace += player_items_to_replace
 
                     old_moved_item_count = moved_item_count
 
@@ -895,7 +960,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 logging.debug(f"Progression balancing moved {new_location.item} to {new_location}, "
                                               f"displacing {old_location.item} into {old_location}")
                                 moved_item_count += 1
-                                state.collect(new_location.item, True, new_location)
+                                search.collect(new_location)
                                 break
                         else:
                             logging.warning(f"Could not Progression Balance {old_location.item}")
@@ -903,7 +968,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
-                        for location in get_sphere_locations(state, unlocked):
+                        for location in take_sphere_locations(search, unlocked):
                             unchecked_locations.remove(location)
                             if not location.locked:
                                 reachable_locations_count[location.player] += 1
@@ -911,7 +976,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
             for location in sphere_locations:
                 if location.advancement:
-                    state.collect(location.item, True, location)
+                    search.collect(location)
             checked_locations |= sphere_locations
 
             if multiworld.has_beaten_game(state):
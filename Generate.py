@@ -51,6 +51,9 @@ def mystery_argparse(argv: list[str] | None = None) -> argparse.Namespace:
                         help="List of options that can be set manually. Can be combined, for example \"bosses, items\"")
     parser.add_argument("--skip_prog_balancing", action="store_true",
                         help="Skip progression balancing step during generation.")
+    parser.add_argument("--profile_generation", "--profile-generation", nargs="?", const="", metavar="PATH",
+                        help="Write the time and memory each generation stage took per world as JSON to PATH, "
+                             "defaulting to AP_<seed name>_profile.json in the output path.")
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
@@ -122,26 +125,29 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     player_id: int = 1
     player_files: dict[int, str] = {}
     player_errors: list[str] = []
+    player_file_paths: dict[str, str] = {}
     for file in os.scandir(args.player_files_path):
         fname = file.name
         if file.is_file() and not fname.startswith(".") and not fname.lower().endswith(".ini") and \
                 os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_for_file = []
-                for doc_idx, yaml in enumerate(read_weights_yamls(path)):
-                    if yaml is None:
-                        logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
-                    else:
-                        weights_for_file.append(yaml)
-                weights_cache[fname] = tuple(weights_for_file)
-
-            except Exception as e:
-                logging.exception(f"Exception reading weights in file {fname}")
-                player_errors.append(
-                    f"{len(player_errors) + 1}. "
-                    f"File {fname} is invalid. Please fix your yaml.\n{Utils.get_all_causes(e)}"
-                )
+            player_file_paths[fname] = os.path.join(args.player_files_path, fname)
+
+    for fname, (yamls, error) in zip(player_file_paths, read_player_files(list(player_file_paths.values()))):
+        if error:
+            trace, causes = error
+            logging.error(f"Exception reading weights in file {fname}\n{trace}")
+            player_errors.append(
+                f"{len(player_errors) + 1}. "
+                f"File {fname} is invalid. Please fix your yaml.\n{causes}"
+            )
+            continue
+        weights_for_file = []
+        for doc_idx, yaml in enumerate(yamls):
+            if yaml is None:
+                logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
+            else:
+                weights_for_file.append(yaml)
+        weights_cache[fname] = tuple(weights_for_file)
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -314,6 +320,35 @@ def read_weights_yamls(path) -> tuple[Any, ...]:
         raise ex
 
 
+def read_player_file(path: str) -> tuple[tuple[Any, ...] | None, tuple[str, str] | None]:
+    """Reads the documents of a player file. If it is invalid, returns its traceback and causes instead, as those
+    can be sent back from a worker process, unlike the chained exceptions."""
+    try:
+        return read_weights_yamls(path), None
+    except Exception as e:
+        import traceback
+        return None, (traceback.format_exc(), Utils.get_all_causes(e))
+
+
+# Parsing takes about 0.1 seconds per MB of yaml. Starting worker processes that have to import Generate again
+# takes longer than that for anything less, so only big asyncs are read in parallel.
+parallel_read_size = 8 * 1024 * 1024
+
+
+def read_player_files(paths: list[str]) -> list[tuple[tuple[Any, ...] | None, tuple[str, str] | None]]:
+    """Reads each player file with read_player_file, spread over worker processes if there is enough to read."""
+    import multiprocessing
+    workers = min(os.cpu_count() or 1, len(paths), 8)
+    size = sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+    # processes of a multiprocessing pool, like WebHost's generators, can't start their own
+    if workers < 2 or size < parallel_read_size or multiprocessing.current_process().daemon:
+        return [read_player_file(path) for path in paths]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(read_player_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
 def interpret_on_off(value) -> bool:
     return {"on": True, "off": False}.get(value, value)
 
@@ -647,6 +682,8 @@ def roll_alttp_settings(ret: argparse.Namespace, weights):
 
 
 if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()  # for the worker processes of read_player_files
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
     erargs, seed = main()
@@ -1,5 +1,5 @@
 import collections
-from collections.abc import Mapping
+from collections.abc import Callable, Mapping
 import concurrent.futures
 import logging
 import os
@@ -7,15 +7,13 @@ import tempfile
 import time
 from typing import Any
 import zipfile
-import zlib
 
-import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, flood_items, \
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
 from NetUtils import convert_to_base_types
 from Options import StartInventoryPool
-from Utils import __version__, output_path, restricted_dumps, version_tuple
+from Utils import __version__, GenerationProfiler, output_path, profile_section, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
 from worlds.generic.Rules import exclusion_rules, locality_rules
@@ -23,6 +21,15 @@ from worlds.generic.Rules import exclusion_rules, locality_rules
 __all__ = ["main"]
 
 
+def _write_generation_profile(multiworld: MultiWorld, args, total_time: float) -> None:
+    if multiworld.profiler:
+        file_path = args.profile_generation or output_path(f"AP_{multiworld.seed_name}_profile.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(multiworld.profiler.to_json(version=__version__, seed_name=multiworld.seed_name,
+                                                players=multiworld.players, total_time=total_time))
+        logging.info(f"Wrote generation profile to {file_path}")
+
+
 def main(args, seed=None, baked_server_options: dict[str, object] | None = None):
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
@@ -34,6 +41,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     start = time.perf_counter()
     # initialize the multiworld
     multiworld = MultiWorld(args.multi)
+    if args.profile_generation is not None:
+        multiworld.profiler = GenerationProfiler()
 
     logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
@@ -51,16 +60,18 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # only the world types in use, as listing all of them would import all worlds
+    world_types = {world.game: type(world) for world in sorted(multiworld.worlds.values(), key=lambda w: w.game)}
+    logger.info(f"Using {len(world_types)} World Types:")
+    longest_name = max(len(text) for text in world_types)
 
-    world_classes = AutoWorld.AutoWorldRegister.world_types.values()
+    world_classes = world_types.values()
 
     version_count = max(len(cls.world_version.as_simple_string()) for cls in world_classes)
     item_count = len(str(max(len(cls.item_names) for cls in world_classes)))
     location_count = len(str(max(len(cls.location_names) for cls in world_classes)))
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: "
                         f"v{cls.world_version.as_simple_string():{version_count}} | "
@@ -185,9 +196,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld._all_state = None
 
     logger.info("Running Item Plando.")
-    resolve_early_locations_for_planned(multiworld)
-    distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
-                                           for x in multiworld.plando_item_blocks[player]])
+    with profile_section(multiworld.profiler, "distribute_planned_blocks"):
+        resolve_early_locations_for_planned(multiworld)
+        distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
+                                               for x in multiworld.plando_item_blocks[player]])
 
     logger.info('Running Pre Main Fill.')
 
@@ -196,14 +208,17 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
     if multiworld.algorithm == 'flood':
-        flood_items(multiworld)  # different algo, biased towards early game progress items
+        with profile_section(multiworld.profiler, "flood_items"):
+            flood_items(multiworld)  # different algo, biased towards early game progress items
     elif multiworld.algorithm == 'balanced':
-        distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
+        with profile_section(multiworld.profiler, "distribute_items_restrictive"):
+            distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
 
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
-        balance_multiworld_progression(multiworld)
+        with profile_section(multiworld.profiler, "balance_multiworld_progression"):
+            balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
 
@@ -211,6 +226,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     multiworld.random.passthrough = False
 
     if args.skip_output:
+        _write_generation_profile(multiworld, args, time.perf_counter() - start)
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
         return multiworld
 
@@ -220,9 +236,11 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if args.spoiler_only:
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            with profile_section(multiworld.profiler, "create_playthrough"):
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         multiworld.spoiler.to_file(output_path('%s_Spoiler.txt' % outfilebase))
+        _write_generation_profile(multiworld, args, time.perf_counter() - start)
         logger.info('Done. Skipped multidata modification. Total time: %s', time.perf_counter() - start)
         return multiworld
 
@@ -230,8 +248,13 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
+        def profiled(stage: str, function: Callable[..., Any], *function_args: Any) -> Any:
+            with profile_section(multiworld.profiler, stage):
+                return function(*function_args)
+
         with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
-            check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
+            check_accessibility_task = pool.submit(profiled, "fulfills_accessibility",
+                                                   multiworld.fulfills_accessibility)
 
             output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
             for player in output_players:
@@ -309,10 +332,11 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
                 # embedded data package
                 data_package = {
-                    game_world.game: worlds.network_data_package["games"][game_world.game]
-                    for game_world in multiworld.worlds.values()
+                    game: world_type.get_data_package_data()
+                    for game, world_type in world_types.items()
                 }
-                data_package["Archipelago"] = worlds.network_data_package["games"]["Archipelago"]
+                data_package["Archipelago"] = AutoWorld.AutoWorldRegister.world_types["Archipelago"] \
+                    .get_data_package_data()
 
                 checks_in_area: dict[int, dict[str, int | list[int]]] = {}
 
@@ -350,13 +374,12 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
+                serialized_multidata = NetUtils.encode_multidata(multidata)
 
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
                     f.write(serialized_multidata)
 
-            output_file_futures.append(pool.submit(write_multidata))
+            output_file_futures.append(pool.submit(profiled, "write_multidata", write_multidata))
             if not check_accessibility_task.result():
                 if not multiworld.can_beat_game():
                     raise FillError("Game appears as unbeatable. Aborting.", multiworld=multiworld)
@@ -371,7 +394,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            with profile_section(multiworld.profiler, "create_playthrough"):
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
             multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
@@ -383,5 +407,6 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
             for file in os.scandir(temp_dir):
                 zf.write(file.path, arcname=file.name)
 
+    _write_generation_profile(multiworld, args, time.perf_counter() - start)
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
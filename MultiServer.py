@@ -16,6 +16,7 @@ import operator
 import pickle
 import random
 import shlex
+import struct
 import threading
 import time
 import typing
@@ -139,6 +140,58 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+class EncodedGamePackages:
+    """
+    Caches the JSON of game data packages by their checksum, so that DataPackage messages can be put together from
+    already encoded game packages. Game packages without a checksum get encoded every time.
+    The cache is shared by all rooms of a process, and forgets the least recently used game packages past maxsize.
+    """
+    encoded: collections.OrderedDict[str, str]
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.encoded = collections.OrderedDict()
+
+    def get(self, game_package: typing.Dict[str, typing.Any]) -> str:
+        checksum = game_package.get("checksum")
+        if checksum is None:
+            return encode(game_package)
+        encoded = self.encoded.get(checksum)
+        if encoded is None:
+            encoded = self.encoded[checksum] = encode(game_package)
+            if len(self.encoded) > self.maxsize:
+                self.encoded.popitem(last=False)
+        else:
+            self.encoded.move_to_end(checksum)
+        return encoded
+
+
+encoded_game_packages = EncodedGamePackages()
+
+
+journal_minimum_size = 1024 * 1024  # size in bytes a journal may always grow to before getting compacted
+journal_entry_header = struct.Struct("<I")
+
+
+def write_journal_entry(file: typing.BinaryIO, entry: typing.Dict[str, typing.Any]) -> None:
+    # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+    encoded_entry = zlib.compress(pickle.dumps(entry))
+    file.write(journal_entry_header.pack(len(encoded_entry)) + encoded_entry)
+    file.flush()
+
+
+def read_journal_entries(file: typing.BinaryIO) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    while True:
+        header = file.read(journal_entry_header.size)
+        if len(header) < journal_entry_header.size:
+            return
+        size, = journal_entry_header.unpack(header)
+        encoded_entry = file.read(size)
+        if len(encoded_entry) < size:
+            return  # cut off while being written
+        yield restricted_loads(zlib.decompress(encoded_entry))
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -237,6 +290,7 @@ class Context:
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    stored_data_notification_prefixes: typing.Dict[str, typing.Set[Client]]
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -247,14 +301,19 @@ class Context:
     all_item_and_group_names: typing.Dict[str, typing.Set[str]]
     all_location_and_group_names: typing.Dict[str, typing.Set[str]]
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
+    name_matchers: typing.Dict[typing.Tuple[str, str], Utils.FuzzyMatcher]
+    """ built on first use by get_name_matcher """
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
+    location_spheres: typing.Dict[int, typing.Dict[int, int]]
     """ each sphere is { player: { location_id, ... } } """
+    load_spheres: typing.Optional[typing.Callable[[], typing.List[typing.Dict[int, typing.Set[int]]]]]
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
                  hint_cost: int, item_cheat: bool, release_mode: str = "disabled", collect_mode="disabled",
                  countdown_mode: str = "auto", remaining_mode: str = "disabled", auto_shutdown: typing.SupportsFloat = 0, 
-                 compatibility: int = 2, log_network: bool = False, logger: logging.Logger = logging.getLogger()):
+                 compatibility: int = 2, log_network: bool = False, logger: logging.Logger = logging.getLogger(),
+                 set_reply_delay: float = 0):
         self.logger = logger
         super(Context, self).__init__()
         self.slot_info = {}
@@ -276,7 +335,10 @@ class Context:
         self.password = password
         self.server = None
         self.countdown_timer = 0
-        self.received_items = {}
+        self.received_items: typing.Dict[typing.Tuple[int, int, bool], typing.List[NetworkItem]] = {}
+        # (team, slot)s that got items since their clients were last sent new items, see send_new_items
+        self.pending_item_slots: typing.Set[team_slot] = set()
+        self.pending_item_flush: typing.Optional[asyncio.Handle] = None
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -284,6 +346,9 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) -> (team, slot)s whose hints may have hints for that location
+        self.location_hint_slots: typing.Dict[typing.Tuple[int, int, int], typing.Set[team_slot]] = \
+            collections.defaultdict(set)
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -295,7 +360,7 @@ class Context:
         self.client_connection_timers: typing.Dict[
             team_slot, datetime.datetime] = {}  # datetime of last connection
         self.client_game_state: typing.Dict[team_slot, int] = collections.defaultdict(int)
-        self.er_hint_data: typing.Dict[int, typing.Dict[int, str]] = {}
+        self.er_hint_data: typing.Mapping[int, typing.Dict[int, str]] = {}
         self.auto_shutdown = auto_shutdown
         self.commandprocessor = ServerCommandProcessor(self)
         self.embedded_blacklist = {"host", "port"}
@@ -303,6 +368,18 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        # journaled saving appends what changed since the last save to a journal file next to the save file,
+        # which gets compacted into the save file once it outgrows it, see _save_journal
+        self.journal_save = False
+        self.journal_generation = 0
+        self.journal_file: typing.Optional[typing.BinaryIO] = None
+        self.journal_lock = threading.Lock()  # guards the journal_ changes below, which are set from the event loop
+        self.journal_write_lock = threading.Lock()
+        self.journal_locations: typing.Dict[team_slot, typing.Set[int]] = {}
+        self.journal_hint_slots: typing.Set[team_slot] = set()
+        self.journal_stored_data_keys: typing.Set[str] = set()
+        self.journal_item_counts: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+        self.snapshot_size = 0
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -312,8 +389,19 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_notification_prefixes = collections.defaultdict(weakref.WeakSet)
+        # lengths of the prefixes in stored_data_notification_prefixes, to look up a key's prefixes by slicing
+        self.stored_data_notification_prefix_lengths: typing.Set[int] = set()
+        # seconds to collect Sets of the same key for, before notifying of all of them in one SetReply, 0 to not wait
+        self.set_reply_delay = set_reply_delay
+        # key to merged SetReply and the client that already got it as reply to its own Set
+        self.pending_set_replies: typing.Dict[str, typing.Tuple[typing.Dict[str, typing.Any],
+                                                                typing.Optional[Client]]] = {}
+        self.pending_set_reply_flush: typing.Optional[asyncio.TimerHandle] = None
         self.read_data = {}
         self.spheres = []
+        self.location_spheres = {}
+        self.load_spheres = None
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -327,6 +415,7 @@ class Context:
         self.location_names = collections.defaultdict(
             lambda: Utils.KeyedDefaultDict(lambda code: f'Unknown location (ID:{code})'))
         self.non_hintable_names = collections.defaultdict(frozenset)
+        self.name_matchers = {}
 
         self._load_game_data()
 
@@ -348,9 +437,13 @@ class Context:
             del game_package["location_name_groups"]
 
     def _init_game_data(self):
+        new_games: typing.List[str] = []
         for game_name, game_package in self.gamespackage.items():
             if "checksum" in game_package:
                 self.checksums[game_name] = game_package["checksum"]
+            if game_name in self.item_names:
+                continue  # lookups were already set up, like the static ones shared by WebHost rooms
+            new_games.append(game_name)
             for item_name, item_id in game_package["item_name_to_id"].items():
                 self.item_names[game_name][item_id] = item_name
             for location_name, location_id in game_package["location_name_to_id"].items():
@@ -362,17 +455,31 @@ class Context:
 
         archipelago_item_names = self.item_names["Archipelago"]
         archipelago_location_names = self.location_names["Archipelago"]
-        for game in [game_name for game_name in self.gamespackage if game_name != "Archipelago"]:
+        for game in [game_name for game_name in new_games if game_name != "Archipelago"]:
             # Add Archipelago items and locations to each data package.
             self.item_names[game].update(archipelago_item_names)
             self.location_names[game].update(archipelago_location_names)
 
+    def get_encoded_data_package(self, games: typing.Iterable[str]) -> str:
+        """Returns the encoded DataPackage message for games, made from the cached JSON of their game packages."""
+        encoded_games = ",".join(f"{encode(game)}:{encoded_game_packages.get(self.gamespackage[game])}"
+                                 for game in games)
+        return f'[{{"cmd":"DataPackage","data":{{"games":{{{encoded_games}}}}}}}]'
+
     def item_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["item_name_to_id"] if game in self.gamespackage else None
 
     def location_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
+    def get_name_matcher(self, game: str, kind: str, names: typing.Collection[str]) -> Utils.FuzzyMatcher:
+        """Returns the FuzzyMatcher of a game's names of a kind, like "item" or "location_and_group",
+        building it from names on first use, to look up names for commands without going through all of them."""
+        matcher = self.name_matchers.get((game, kind))
+        if matcher is None:
+            matcher = self.name_matchers[game, kind] = Utils.FuzzyMatcher(names)
+        return matcher
+
     # General networking
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
@@ -485,11 +592,8 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
-        format_version = data[0]
-        if format_version > 3:
-            raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+    def decompress(data: bytes) -> MultiData:
+        return NetUtils.decode_multidata(data)
 
     def _load(self, decoded_obj: MultiData, game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
@@ -536,10 +640,14 @@ class Context:
         self.connect_names = decoded_obj['connect_names']
         self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
-        self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
-                             for player, loc_data in decoded_obj["er_hint_data"].items()}
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
+        er_hint_data = decoded_obj["er_hint_data"]
+        if isinstance(er_hint_data, NetUtils.MultiDataSections):
+            self.er_hint_data = er_hint_data  # decoded per player on first use, keys are already int
+        else:
+            self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
+                                 for player, loc_data in er_hint_data.items()}
 
         # load start inventory:
         for slot, item_codes in decoded_obj["precollected_items"].items():
@@ -547,6 +655,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            self.index_hints(0, slot, hints)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -576,7 +685,14 @@ class Context:
             self.read_data[f"location_name_groups_{game_name}"] = lambda lgame=game_name: self.location_name_groups[lgame]
 
         # sorted access spheres
-        self.spheres = decoded_obj.get("spheres", [])
+        self.spheres = []
+        self.location_spheres = {}
+        if isinstance(decoded_obj, NetUtils.LazyMultiData):
+            self.load_spheres = lambda: decoded_obj.get("spheres", [])  # decoded and indexed on first use
+        else:
+            self.load_spheres = None
+            self.spheres = decoded_obj.get("spheres", [])
+            self.location_spheres = NetUtils.index_spheres(self.spheres)
 
     # saving
 
@@ -593,17 +709,27 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if self.journal_save:
+                self._save_journal(exit_save)
+            else:
+                # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+                encoded_save = pickle.dumps(self.get_save())
+                with open(self.save_filename, "wb") as f:
+                    f.write(zlib.compress(encoded_save))
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
             return True
 
-    def init_save(self, enabled: bool = True):
+    def init_save(self, enabled: bool = True, journal: bool = False):
+        """
+        Loads the save file and starts saving regularly.
+
+        :param enabled: If saving is enabled at all.
+        :param journal: If changes get appended to a journal instead of rewriting the entire save file every time,
+                        see _save_journal.
+        """
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
@@ -611,16 +737,114 @@ class Context:
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            self.journal_save = journal
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                self._replay_journal(save_data)
+                self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
                 self.logger.exception(e)
+            if journal:
+                # start a fresh journal on top of the loaded state
+                self._compact_journal()
+            else:
+                # a journal of the loaded save is outdated once the save file gets overwritten
+                self.journal_generation += 1
             self._start_async_saving()
 
+    @property
+    def journal_filename(self) -> str:
+        return self.save_filename + ".journal"
+
+    def _save_journal(self, exit_save: bool = False) -> None:
+        """
+        Appends everything that changed since the last journal entry to the journal.
+        Once the journal has grown larger than the save file, it gets compacted into a new save file instead.
+        """
+        with self.journal_write_lock:
+            if self.journal_file is None or \
+                    not exit_save and self.journal_file.tell() > max(self.snapshot_size, journal_minimum_size):
+                self._compact_journal()
+            else:
+                write_journal_entry(self.journal_file, self._get_journal_entry())
+
+    def _get_journal_entry(self) -> typing.Dict[str, typing.Any]:
+        with self.journal_lock:
+            locations, self.journal_locations = self.journal_locations, {}
+            hint_slots, self.journal_hint_slots = self.journal_hint_slots, set()
+            stored_data_keys, self.journal_stored_data_keys = self.journal_stored_data_keys, set()
+
+        received_items: typing.Dict[typing.Tuple[int, int, bool], typing.Tuple[int, typing.List[NetworkItem]]] = {}
+        for key, items in tuple(self.received_items.items()):
+            start = self.journal_item_counts.get(key, 0)
+            if len(items) > start:
+                new_items = items[start:]
+                received_items[key] = start, new_items
+                self.journal_item_counts[key] = start + len(new_items)
+
+        entry = self.get_save_state()
+        entry.update({
+            "received_items": received_items,
+            "location_checks": locations,
+            "hints": {team_slot: set(self.hints[team_slot]) for team_slot in hint_slots},
+            "stored_data": {key: self.stored_data[key] for key in stored_data_keys if key in self.stored_data},
+        })
+        return entry
+
+    def _compact_journal(self) -> None:
+        """Writes a new save file with everything in the journal, then starts a new journal on top of it."""
+        import os
+        with self.journal_lock:
+            self.journal_locations = {}
+            self.journal_hint_slots = set()
+            self.journal_stored_data_keys = set()
+        # taken before the save, as anything appended while saving is safe to be replayed again
+        self.journal_item_counts = {key: len(items) for key, items in tuple(self.received_items.items())}
+        self.journal_generation += 1
+
+        encoded_save = zlib.compress(pickle.dumps(self.get_save()))
+        temp_filename = self.save_filename + ".tmp"
+        with open(temp_filename, "wb") as f:
+            f.write(encoded_save)
+        os.replace(temp_filename, self.save_filename)
+        self.snapshot_size = len(encoded_save)
+
+        if self.journal_file:
+            self.journal_file.close()
+        # a journal of an older generation is ignored, should this not get written
+        self.journal_file = open(self.journal_filename, "wb")
+        write_journal_entry(self.journal_file, {"journal_generation": self.journal_generation})
+
+    def _replay_journal(self, save_data: typing.Dict[str, typing.Any]) -> None:
+        """Applies the entries of the journal that was started on top of save_data to it."""
+        try:
+            with open(self.journal_filename, "rb") as f:
+                entries = list(read_journal_entries(f))
+        except FileNotFoundError:
+            return
+        if not entries or entries[0].get("journal_generation") != save_data.get("journal_generation"):
+            self.logger.info("Ignoring save journal, as it was already compacted into the save file.")
+            return
+
+        received_items = save_data["received_items"]
+        location_checks = save_data["location_checks"]
+        for entry in entries[1:]:
+            for key, (start, items) in entry.pop("received_items").items():
+                slot_items = received_items.setdefault(key, [])
+                if len(slot_items) < start:
+                    raise Exception(f"Save journal is missing received items of {key}.")
+                # items appended while compacting may be in both the save and the journal
+                slot_items.extend(items[len(slot_items) - start:])
+            for key, locations in entry.pop("location_checks").items():
+                location_checks.setdefault(key, set()).update(locations)
+            save_data["hints"].update(entry.pop("hints"))
+            save_data.setdefault("stored_data", {}).update(entry.pop("stored_data"))
+            save_data.update(entry)
+        self.logger.info(f"Replayed {len(entries) - 1} save journal entries.")
+
     def _start_async_saving(self, atexit_save: bool = True):
         if not self.auto_saver_thread:
             def save_regularly():
@@ -653,14 +877,23 @@ class Context:
                 atexit.register(self._save, True)  # make sure we save on exit too
 
     def get_save(self) -> dict:
-        self.recheck_hints()
         d = {
             "version": self.save_version,
             "connect_names": self.connect_names,
+            "journal_generation": self.journal_generation,
             "received_items": self.received_items,
-            "hints_used": dict(self.hints_used),
             "hints": dict(self.hints),
             "location_checks": dict(self.location_checks),
+            "stored_data": self.stored_data,
+            **self.get_save_state()
+        }
+
+        return d
+
+    def get_save_state(self) -> dict:
+        """The part of the save data that is small enough to be saved in full with every journal entry."""
+        return {
+            "hints_used": dict(self.hints_used),
             "name_aliases": self.name_aliases,
             "client_game_state": dict(self.client_game_state),
             "client_activity_timers": tuple(
@@ -669,18 +902,14 @@ class Context:
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
                              "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
                              "countdown_mode": self.countdown_mode,
                              "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
         }
 
-        return d
-
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
@@ -689,6 +918,8 @@ class Context:
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        for (team, slot), hints in savedata["hints"].items():
+            self.index_hints(team, slot, hints)
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -700,6 +931,7 @@ class Context:
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
         self.random.setstate(savedata["random_state"])
+        self.journal_generation = savedata.get("journal_generation", 0)
 
         if "game_options" in savedata:
             self.hint_cost = savedata["game_options"]["hint_cost"]
@@ -747,6 +979,7 @@ class Context:
                 new_hints.add(new_hint)
                 if hint == new_hint:
                     continue
+                self.journal_hints(hint_team, hint_slot)
                 for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
                     if changed is not None:
                         changed.add((hint_team,player))
@@ -754,20 +987,65 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def index_hints(self, team: int, slot: int, hints: typing.Iterable[Hint]) -> None:
+        """Remembers that the hints of team and slot hold these hints, see recheck_location_hints."""
+        for hint in hints:
+            self.location_hint_slots[team, hint.finding_player, hint.location].add((team, slot))
+
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Set[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes the hints for the newly checked locations of team and slot.
+        Unlike recheck_hints, this only goes through the hints of slots that have hints for these locations.
+        If a set is passed for 'changed', each (team,slot) pair that has a hint modified will be added to it.
+        """
+        hint_slots: typing.Set[team_slot] = set()
+        for location in locations:
+            hint_slots.update(self.location_hint_slots.get((team, slot, location), ()))
+        for hint_team_slot in hint_slots:
+            hints = self.hints[hint_team_slot]
+            rechecked_hints = [(hint, hint.re_check(self, team)) for hint in hints
+                               if hint.finding_player == slot and hint.location in locations]
+            for hint, new_hint in rechecked_hints:
+                if hint != new_hint:
+                    hints.remove(hint)
+                    hints.add(new_hint)
+                    self.journal_hints(*hint_team_slot)
+                    if changed is not None:
+                        changed.add(hint_team_slot)
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
 
+    def _index_spheres(self) -> None:
+        if self.load_spheres:
+            self.spheres = self.load_spheres()
+            self.location_spheres = NetUtils.index_spheres(self.spheres)
+            self.load_spheres = None
+
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
+        self._index_spheres()
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
-            raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
-                           f"Location or player may not exist.")
+            try:
+                return self.location_spheres[player][location_id]
+            except KeyError:
+                raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
+                               f"Location or player may not exist.") from None
         return -1
 
+    def get_spheres(self, player: int, location_ids: typing.Iterable[int]) -> typing.List[int]:
+        """Get the spheres of several locations of a player, -1 for each if spheres are not available."""
+        self._index_spheres()
+        if self.spheres:
+            player_spheres = self.location_spheres.get(player, {})
+            try:
+                return [player_spheres[location_id] for location_id in location_ids]
+            except KeyError as e:
+                raise KeyError(f"No Sphere found for location ID {e.args[0]} belonging to player {player}. "
+                               f"Location or player may not exist.") from None
+        return [-1 for _ in location_ids]
+
     def get_players_package(self):
         return [NetworkPlayer(t, p, self.get_aliased_name(t, p), n) for (t, p), n in self.player_names.items()]
 
@@ -828,6 +1106,9 @@ class Context:
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
                         new_hint_events.add(player)
+                    for player in new_hint_events:
+                        self.index_hints(team, player, (hint,))
+                        self.journal_hints(team, player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
@@ -851,7 +1132,34 @@ class Context:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
-    
+            self.journal_hints(team, slot)
+
+    def get_set_notify_clients(self, key: str) -> typing.Set[Client]:
+        """Returns the clients that registered to be notified of changes to key, either by key or by a prefix of it."""
+        clients = set(self.stored_data_notification_clients.get(key, ()))
+        for length in self.stored_data_notification_prefix_lengths:
+            prefix_clients = self.stored_data_notification_prefixes.get(key[:length])
+            if prefix_clients:
+                clients.update(prefix_clients)
+        return clients
+
+    # journal, see _save_journal
+
+    def journal_location_checks(self, team: int, slot: int, locations: typing.Set[int]) -> None:
+        if self.journal_save:
+            with self.journal_lock:
+                self.journal_locations.setdefault((team, slot), set()).update(locations)
+
+    def journal_hints(self, team: int, slot: int) -> None:
+        if self.journal_save:
+            with self.journal_lock:
+                self.journal_hint_slots.add((team, slot))
+
+    def journal_stored_data(self, key: str) -> None:
+        if self.journal_save:
+            with self.journal_lock:
+                self.journal_stored_data_keys.add(key)
+
     # "events"
 
     def on_goal_achieved(self, client: Client):
@@ -873,13 +1181,13 @@ class Context:
 
     def on_changed_hints(self, team: int, slot: int):
         key: str = f"_read_hints_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        targets: typing.Set[Client] = self.get_set_notify_clients(key)
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        targets: typing.Set[Client] = self.get_set_notify_clients(key)
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.client_game_state[team, slot]}])
 
@@ -1067,20 +1375,37 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Sends the items received since the last call to the clients of the slots that received them."""
+    ctx.pending_item_flush = None
+    pending_item_slots = ctx.pending_item_slots
+    ctx.pending_item_slots = set()
+    for team, slot in pending_item_slots:
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                async_start(ctx.send_msgs(client, [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                client.send_index = len(start_inventory) + len(items)
+
+
+def queue_new_items(ctx: Context):
+    """
+    Sends new items once the running event loop iteration is done, so that items received by the same client in
+    several events of this iteration get sent in one message.
+    """
+    if ctx.pending_item_flush is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            send_new_items(ctx)
+        else:
+            ctx.pending_item_flush = loop.call_soon(send_new_items, ctx)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1128,6 +1453,7 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.pending_item_slots.add((team, target))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1165,14 +1491,15 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
-        send_new_items(ctx)
+        ctx.journal_location_checks(team, slot, new_locations)
+        queue_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
             "hint_points": get_slot_points(ctx, team, slot),
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1658,15 +1985,17 @@ class ClientMessageProcessor(CommonCommandProcessor):
     def _cmd_getitem(self, item_name: str) -> bool:
         """Cheat in an item, if it is enabled on this server"""
         if self.ctx.item_cheat:
-            names = self.ctx.item_names_for_game(self.ctx.games[self.client.slot])
+            game = self.ctx.games[self.client.slot]
+            names = self.ctx.item_names_for_game(game)
             item_name, usable, response = get_intended_text(
                 item_name,
-                names
+                self.ctx.get_name_matcher(game, "item", names)
             )
             if usable:
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.pending_item_slots.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1687,6 +2016,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
             hints = {hint.re_check(self.ctx, self.client.team) for hint in
                      self.ctx.hints[self.client.team, self.client.slot]}
             self.ctx.hints[self.client.team, self.client.slot] = hints
+            self.ctx.journal_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1717,9 +2047,9 @@ class ClientMessageProcessor(CommonCommandProcessor):
             if game not in self.ctx.all_item_and_group_names:
                 self.output("Can't look up item/location for unknown game. Hint for ID instead.")
                 return False
-            names = self.ctx.all_location_and_group_names[game] \
+            names = self.ctx.get_name_matcher(game, "location_and_group", self.ctx.all_location_and_group_names[game]) \
                 if for_location else \
-                self.ctx.all_item_and_group_names[game]
+                self.ctx.get_name_matcher(game, "item_and_group", self.ctx.all_item_and_group_names[game])
             hint_name, usable, response = get_intended_text(input_text, names)
 
             if usable:
@@ -1844,7 +2174,7 @@ def get_slot_points(ctx: Context, team: int, slot: int) -> int:
             ctx.get_hint_cost(slot) * ctx.hints_used[team, slot])
 
 
-async def process_client_cmd(ctx: Context, client: Client, args: dict):
+async def process_client_cmd(ctx: Context, client: Client, args: typing.Dict[str, typing.Any]):
     try:
         cmd: str = args["cmd"]
     except:
@@ -1934,23 +2264,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            requested_games = set(args.get("games", []))
+            games = [name for name in ctx.gamespackage if name in requested_games]
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
+            games = [name for name in ctx.gamespackage if name not in exclusions]
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = list(ctx.gamespackage)
+        await ctx.send_encoded_msgs(client, ctx.get_encoded_data_package(games))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -2166,33 +2488,110 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             await ctx.send_msgs(client, [args])
 
         elif cmd == "Set":
-            if "key" not in args or args["key"].startswith("_read_") or \
-                    "operations" not in args or not type(args["operations"]) == list:
+            if not is_valid_set(args):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'Set', "original_cmd": cmd}])
                 return
-            args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
-            args["slot"] = client.slot
-            for operation in args["operations"]:
-                func = modify_functions[operation["operation"]]
-                value = func(value, operation["value"])
-            ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
-            if args.get("want_reply", False):
-                targets.add(client)
-            if targets:
-                ctx.broadcast(targets, [args])
+            set_stored_data(ctx, client, args)
             ctx.save()
 
+        elif cmd == "SetMany":
+            if type(args.get("sets")) != list or not all(is_valid_set(set_args) for set_args in args["sets"]):
+                await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
+                                              "text": 'SetMany', "original_cmd": cmd}])
+                return
+            failed_keys = []
+            for set_args in args["sets"]:
+                try:
+                    set_stored_data(ctx, client, set_args)
+                except Exception as e:
+                    # an operation that can't be applied to the stored value only skips its own entry,
+                    # the entries before it are applied and announced already
+                    failed_keys.append(f"{set_args['key']} ({type(e).__name__})")
+            ctx.save()
+            if failed_keys:
+                await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
+                                              "text": f"SetMany: failed to set {', '.join(failed_keys)}",
+                                              "original_cmd": cmd}])
+
         elif cmd == "SetNotify":
-            if "keys" not in args or type(args["keys"]) != list:
+            if "keys" not in args or type(args["keys"]) != list or \
+                    type(args.get("prefixes", [])) != list:
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'SetNotify', "original_cmd": cmd}])
                 return
             for key in args["keys"]:
                 ctx.stored_data_notification_clients[key].add(client)
+            for prefix in args.get("prefixes", []):
+                ctx.stored_data_notification_prefixes[prefix].add(client)
+                ctx.stored_data_notification_prefix_lengths.add(len(prefix))
+
+
+def is_valid_set(args: typing.Any) -> bool:
+    return isinstance(args, dict) and isinstance(args.get("key"), str) and not args["key"].startswith("_read_") \
+        and type(args.get("operations")) == list and all(
+            isinstance(operation, dict) and operation.get("operation") in modify_functions and "value" in operation
+            for operation in args["operations"])
+
+
+def set_stored_data(ctx: Context, client: Client, args: typing.Dict[str, typing.Any]) -> None:
+    """Applies the operations of a Set package to the data storage and notifies the clients that want to know."""
+    args["cmd"] = "SetReply"
+    value = ctx.stored_data.get(args["key"], args.get("default", 0))
+    args["original_value"] = copy.copy(value)
+    args["slot"] = client.slot
+    for operation in args["operations"]:
+        func = modify_functions[operation["operation"]]
+        value = func(value, operation["value"])
+    ctx.stored_data[args["key"]] = args["value"] = value
+    ctx.journal_stored_data(args["key"])
+    if ctx.set_reply_delay:
+        # the setting client may need the exact original_value of its own Set, so it gets its reply right away
+        replied_client = None
+        if args.get("want_reply", False):
+            ctx.broadcast((client,), [args])
+            replied_client = client
+        queue_set_reply(ctx, args, replied_client)
+    else:
+        targets = ctx.get_set_notify_clients(args["key"])
+        if args.get("want_reply", False):
+            targets.add(client)
+        if targets:
+            ctx.broadcast(targets, [args])
+
+
+def queue_set_reply(ctx: Context, reply: typing.Dict[str, typing.Any], replied_client: typing.Optional[Client] = None):
+    """
+    Sends the SetReply to the clients registered for its key after ctx.set_reply_delay,
+    merged with the other SetReplies of the same key in the meantime.
+    replied_client already got this SetReply, so it is skipped unless another Set of the key follows.
+    """
+    pending = ctx.pending_set_replies.get(reply["key"])
+    if pending:
+        # one SetReply for all of them, going from the value before the first Set to the value after the last Set
+        reply = {**reply, "original_value": pending[0]["original_value"]}
+    # the reply to the last Set holds the current value, so its client has seen every Set before it as well
+    ctx.pending_set_replies[reply["key"]] = reply, replied_client
+    if ctx.pending_set_reply_flush is None:
+        ctx.pending_set_reply_flush = asyncio.get_running_loop().call_later(ctx.set_reply_delay, send_set_replies, ctx)
+
+
+def send_set_replies(ctx: Context):
+    """Sends the SetReplies queued by queue_set_reply, with all of them in one message per client."""
+    ctx.pending_set_reply_flush = None
+    replies = ctx.pending_set_replies
+    ctx.pending_set_replies = {}
+    client_replies: typing.Dict[Client, typing.List[typing.Dict[str, typing.Any]]] = collections.defaultdict(list)
+    for key, (reply, replied_client) in replies.items():
+        for client in ctx.get_set_notify_clients(key):
+            if client is not replied_client:
+                client_replies[client].append(reply)
+    # clients that get the same SetReplies share one encoded message
+    reply_clients: typing.Dict[typing.Tuple[str, ...], typing.List[Client]] = collections.defaultdict(list)
+    for client, client_reply in client_replies.items():
+        reply_clients[tuple(reply["key"] for reply in client_reply)].append(client)
+    for keys, clients in reply_clients.items():
+        ctx.broadcast(clients, [replies[key][0] for key in keys])
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
@@ -2368,8 +2767,9 @@ class ServerCommandProcessor(CommonCommandProcessor):
         if usable:
             team, slot = self.ctx.player_name_lookup[seeked_player]
             item_name = " ".join(item_name)
-            names = self.ctx.item_names_for_game(self.ctx.games[slot])
-            item_name, usable, response = get_intended_text(item_name, names)
+            game = self.ctx.games[slot]
+            names = self.ctx.item_names_for_game(game)
+            item_name, usable, response = get_intended_text(item_name, self.ctx.get_name_matcher(game, "item", names))
             if usable:
                 amount: int = int(amount)
                 if amount > 100:
@@ -2404,7 +2804,8 @@ class ServerCommandProcessor(CommonCommandProcessor):
             if full_name.isnumeric():
                 location, usable, response = int(full_name), True, None
             elif self.ctx.location_names_for_game(game) is not None:
-                location, usable, response = get_intended_text(full_name, self.ctx.location_names_for_game(game))
+                location, usable, response = get_intended_text(
+                    full_name, self.ctx.get_name_matcher(game, "location", self.ctx.location_names_for_game(game)))
             else:
                 self.output("Can't look up location for unknown game. Send by ID instead.")
                 return False
@@ -2435,7 +2836,9 @@ class ServerCommandProcessor(CommonCommandProcessor):
             if full_name.isnumeric():
                 item, usable, response = int(full_name), True, None
             elif game in self.ctx.all_item_and_group_names:
-                item, usable, response = get_intended_text(full_name, self.ctx.all_item_and_group_names[game])
+                item, usable, response = get_intended_text(
+                    full_name,
+                    self.ctx.get_name_matcher(game, "item_and_group", self.ctx.all_item_and_group_names[game]))
             else:
                 self.output("Can't look up item for unknown game. Hint for ID instead.")
                 return False
@@ -2474,7 +2877,9 @@ class ServerCommandProcessor(CommonCommandProcessor):
             if full_name.isnumeric():
                 location, usable, response = int(full_name), True, None
             elif game in self.ctx.all_location_and_group_names:
-                location, usable, response = get_intended_text(full_name, self.ctx.all_location_and_group_names[game])
+                location, usable, response = get_intended_text(
+                    full_name,
+                    self.ctx.get_name_matcher(game, "location_and_group", self.ctx.all_location_and_group_names[game]))
             else:
                 self.output("Can't look up location for unknown game. Hint for ID instead.")
                 return False
@@ -2581,6 +2986,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--journal_save', default=defaults["journal_save"], action='store_true',
+                        help="Append changes to a journal instead of rewriting the entire save file every autosave.")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2635,6 +3042,9 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--set_reply_delay', default=defaults["set_reply_delay"], type=float,
+                        help="Seconds to collect data storage changes of the same key for, "
+                             "before notifying of them in one SetReply. 0 notifies of every change right away.")
     args = parser.parse_args()
     return args
 
@@ -2681,7 +3091,8 @@ async def main(args: argparse.Namespace):
     ctx = Context(args.host, args.port, args.server_password, args.password, args.location_check_points,
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.countdown_mode, args.remaining_mode,
-                  args.auto_shutdown, args.compatibility, args.log_network)
+                  args.auto_shutdown, args.compatibility, args.log_network,
+                  set_reply_delay=args.set_reply_delay)
     data_filename = args.multidata
 
     if not data_filename:
@@ -2711,7 +3122,7 @@ async def main(args: argparse.Namespace):
         logging.exception(f"Failed to read multiworld data ({e})")
         raise
 
-    ctx.init_save(not args.disable_save)
+    ctx.init_save(not args.disable_save, args.journal_save)
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
 
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterator, Mapping, MutableMapping, Sequence
 import typing
 import enum
+import struct
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, VersionException, restricted_dumps, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -414,9 +416,16 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+# receiving player -> (position in the store, sending player, location ID, (item ID, receiving player, flags))
+_ReceiverIndex = typing.Dict[int, typing.List[typing.Tuple[int, int, int, typing.Tuple[int, int, int]]]]
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
+    _receiver_index: typing.Optional[_ReceiverIndex]
+
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
+        self._receiver_index = None
 
         if not self:
             raise ValueError(f"Rejecting game with 0 players")
@@ -427,20 +436,36 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+    def _get_receiver_index(self) -> _ReceiverIndex:
+        """
+        Returns the locations by receiving player, in the order of the store.
+        Built on first use, so the store is not to be changed after that.
+        """
+        if self._receiver_index is None:
+            receiver_index: _ReceiverIndex = {}
+            position = 0
+            for sending_player, check_data in self.items():
+                for location_id, location_data in check_data.items():
+                    receiver_index.setdefault(location_data[1], []).append(
+                        (position, sending_player, location_id, location_data))
+                    position += 1
+            self._receiver_index = receiver_index
+        return self._receiver_index
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
-        for finding_player, check_data in self.items():
-            for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-                if receiving_player in slots and item_id == seeked_item_id:
-                    yield finding_player, location_id, item_id, receiving_player, item_flags
+        receiver_index = self._get_receiver_index()
+        found = [entry for slot in slots for entry in receiver_index.get(slot, ()) if entry[3][0] == seeked_item_id]
+        if len(slots) > 1:
+            found.sort()  # into the order of the store
+        for _, finding_player, location_id, (item_id, receiving_player, item_flags) in found:
+            yield finding_player, location_id, item_id, receiving_player, item_flags
 
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
         import collections
         all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
-        for source_slot, location_data in self.items():
-            for location_id, values in location_data.items():
-                if values[1] == slot:
-                    all_locations[source_slot].add(location_id)
+        for _, source_slot, location_id, _ in self._get_receiver_index().get(slot, ()):
+            all_locations[source_slot].add(location_id)
         return all_locations
 
     def get_checked(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int
@@ -510,6 +535,133 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+def index_spheres(spheres: typing.Sequence[Mapping[int, typing.Iterable[int]]]) -> dict[int, dict[int, int]]:
+    """Indexes the spheres of a multidata by player, then location ID, to the number of the sphere the location is in."""
+    location_spheres: dict[int, dict[int, int]] = {}
+    # walk backwards, so that the first sphere wins should a location be in several
+    for sphere_number in reversed(range(len(spheres))):
+        for player, locations in spheres[sphere_number].items():
+            location_spheres.setdefault(player, {}).update(dict.fromkeys(locations, sphere_number))
+    return location_spheres
+
+
+multidata_format_version = 4
+"""Format written by encode_multidata. Formats up to 3 are a single compressed pickle of the whole multidata."""
+multidata_index_header = struct.Struct("<I")
+# multidata keys that get their own section, and whether that section is split up further by the key's own keys
+multidata_sections: dict[str, bool] = {
+    "slot_data": True,
+    "er_hint_data": True,
+    "locations": False,
+    "checks_in_area": False,
+    "spheres": False,
+    "datapackage": False,
+}
+
+
+def encode_multidata(multidata: Mapping[str, typing.Any]) -> bytes:
+    """Encodes multidata to the current format, in which slot_data, spheres and other large parts of it
+    are compressed separately, so that they can be decoded when first used. See LazyMultiData."""
+    sections = bytearray()
+
+    def add_section(value: typing.Any) -> tuple[int, int]:
+        start = len(sections)
+        sections.extend(zlib.compress(restricted_dumps(value), 9))
+        return start, len(sections)
+
+    index: dict[str, typing.Any] = {}
+    base: dict[str, typing.Any] = {}
+    for key, value in multidata.items():
+        split = multidata_sections.get(key)
+        if split is None:
+            base[key] = value
+        elif split:
+            index[key] = {sub_key: add_section(sub_value) for sub_key, sub_value in value.items()}
+        else:
+            index[key] = add_section(value)
+    index[""] = add_section(base)
+    encoded_index = zlib.compress(restricted_dumps(index), 9)
+    return bytes([multidata_format_version]) + multidata_index_header.pack(len(encoded_index)) + encoded_index + \
+        sections
+
+
+def decode_multidata(data: bytes) -> MultiData:
+    format_version = data[0]
+    if format_version > multidata_format_version:
+        raise VersionException("Incompatible multidata.")
+    if format_version < 4:
+        return restricted_loads(zlib.decompress(data[1:]))
+    return typing.cast(MultiData, LazyMultiData(data))
+
+
+class LazyMultiData(MutableMapping[str, typing.Any]):
+    """Multidata of format 4, which decodes its sections when they are first accessed.
+    Sections that are split up, like slot_data, are returned as MultiDataSections."""
+    _data: memoryview
+    _index: dict[str, typing.Any]
+    _values: dict[str, typing.Any]
+
+    def __init__(self, data: bytes) -> None:
+        (index_size,) = multidata_index_header.unpack_from(data, 1)
+        index_start = 1 + multidata_index_header.size
+        self._data = memoryview(data)[index_start + index_size:]
+        self._index = restricted_loads(zlib.decompress(data[index_start:index_start + index_size]))
+        self._values = self.decode_section(self._index.pop(""))
+
+    def decode_section(self, section: tuple[int, int]) -> typing.Any:
+        start, end = section
+        return restricted_loads(zlib.decompress(self._data[start:end]))
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key in self._values:
+            return self._values[key]
+        section = self._index.pop(key)
+        value = MultiDataSections(self, section) if isinstance(section, dict) else self.decode_section(section)
+        self._values[key] = value
+        return value
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self._index.pop(key, None)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._index:
+            del self._index[key]
+        else:
+            del self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        # decoding a section moves its key, so iterate over a copy
+        return iter([*self._values, *self._index])
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._index)
+
+
+class MultiDataSections(Mapping[typing.Any, typing.Any]):
+    """Part of a LazyMultiData that is split up by key, like slot_data by slot, each decoded on first access."""
+    _multidata: LazyMultiData
+    _index: dict[typing.Any, tuple[int, int]]
+    _values: dict[typing.Any, typing.Any]
+
+    def __init__(self, multidata: LazyMultiData, index: dict[typing.Any, tuple[int, int]]) -> None:
+        self._multidata = multidata
+        self._index = index
+        self._values = {}
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        if key in self._values:
+            return self._values[key]
+        value = self._values[key] = self._multidata.decode_section(self._index[key])
+        return value
+
+    def __iter__(self) -> Iterator[typing.Any]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
@@ -9,7 +9,9 @@ import subprocess
 import base64
 import logging
 import asyncio
+import bisect
 import enum
+import itertools
 import typing
 
 from json import loads, dumps
@@ -129,6 +131,8 @@ class SNIContext(CommonContext):
     snes_recv_queue: "asyncio.Queue[bytes]"
     snes_request_lock: asyncio.Lock
     snes_write_buffer: typing.List[typing.Tuple[int, bytes]]
+    snes_last_reads: typing.Dict[typing.Tuple[int, int], bytes]
+    """ (address, size) -> bytes of the last snes_read_changes, cleared with the ROM """
     snes_connector_lock: threading.Lock
     death_state: DeathState
     killing_player_task: "typing.Optional[asyncio.Task[None]]"
@@ -155,6 +159,7 @@ class SNIContext(CommonContext):
         self.snes_recv_queue = asyncio.Queue()
         self.snes_request_lock = asyncio.Lock()
         self.snes_write_buffer = []
+        self.snes_last_reads = {}
         self.snes_connector_lock = threading.Lock()
         self.death_state = DeathState.alive  # for death link flop behaviour
         self.killing_player_task = None
@@ -508,6 +513,7 @@ async def snes_recv_loop(ctx: SNIContext) -> None:
         ctx.hud_message_queue = []
 
         ctx.rom = None
+        ctx.snes_last_reads = {}
 
         if ctx.snes_reconnect_address:
             snes_logger.info(f"... automatically reconnecting to snes in {_global_snes_reconnect_delay} seconds")
@@ -515,47 +521,132 @@ async def snes_recv_loop(ctx: SNIContext) -> None:
             ctx.snes_autoreconnect_task = asyncio.create_task(snes_autoreconnect(ctx), name="snes auto-reconnect")
 
 
-async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
+async def _snes_get_address(ctx: SNIContext, ranges: typing.Sequence[typing.Tuple[int, int]]) \
+        -> typing.Optional[bytes]:
+    """Reads the (address, size) ranges in one GetAddress request, returning their bytes one after another.
+    Needs snes_request_lock to be held."""
+    if (
+        ctx.snes_state != SNESState.SNES_ATTACHED or
+        ctx.snes_socket is None or
+        not ctx.snes_socket.open or
+        ctx.snes_socket.closed
+    ):
+        return None
+
+    GetAddress_Request: SNESRequest = {
+        "Opcode": "GetAddress",
+        "Space": "SNES",
+        "Operands": [operand for address, size in ranges for operand in (hex(address)[2:], hex(size)[2:])]
+    }
     try:
-        await ctx.snes_request_lock.acquire()
+        await ctx.snes_socket.send(dumps(GetAddress_Request))
+    except ConnectionClosed:
+        return None
 
-        if (
-            ctx.snes_state != SNESState.SNES_ATTACHED or
-            ctx.snes_socket is None or
-            not ctx.snes_socket.open or
-            ctx.snes_socket.closed
-        ):
-            return None
-
-        GetAddress_Request: SNESRequest = {
-            "Opcode": "GetAddress",
-            "Space": "SNES",
-            "Operands": [hex(address)[2:], hex(size)[2:]]
-        }
+    size = sum(size for address, size in ranges)
+    data: bytes = bytes()
+    while len(data) < size:
         try:
-            await ctx.snes_socket.send(dumps(GetAddress_Request))
-        except ConnectionClosed:
-            return None
+            data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
+        except asyncio.TimeoutError:
+            break
 
-        data: bytes = bytes()
-        while len(data) < size:
-            try:
-                data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
-            except asyncio.TimeoutError:
-                break
-
-        if len(data) != size:
-            snes_logger.error('Error reading %s, requested %d bytes, received %d' % (hex(address), size, len(data)))
-            if len(data):
-                snes_logger.error(str(data))
-                snes_logger.warning('Communication Failure with SNI')
-            if ctx.snes_socket is not None and not ctx.snes_socket.closed:
-                await ctx.snes_socket.close()
-            return None
+    if len(data) != size:
+        snes_logger.error('Error reading %s, requested %d bytes, received %d' %
+                          (", ".join(hex(address) for address, _ in ranges), size, len(data)))
+        if len(data):
+            snes_logger.error(str(data))
+            snes_logger.warning('Communication Failure with SNI')
+        if ctx.snes_socket is not None and not ctx.snes_socket.closed:
+            await ctx.snes_socket.close()
+        return None
 
-        return data
-    finally:
-        ctx.snes_request_lock.release()
+    return data
+
+
+async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
+    async with ctx.snes_request_lock:
+        return await _snes_get_address(ctx, [(address, size)])
+
+
+# usb2snes devices read at most this many ranges in one go, more are sent as separate requests
+max_ranges_per_read = 8
+
+
+def merge_read_ranges(ranges: typing.Iterable[typing.Tuple[int, int]]) -> typing.List[typing.Tuple[int, int]]:
+    """Merges overlapping and adjacent (address, size) ranges, so each byte is read once."""
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for address, size in sorted(ranges):
+        if merged and address <= merged[-1][0] + merged[-1][1]:
+            merged_address, merged_size = merged[-1]
+            merged[-1] = merged_address, max(merged_size, address + size - merged_address)
+        else:
+            merged.append((address, size))
+    return merged
+
+
+async def snes_read_ranges(ctx: SNIContext, ranges: typing.Sequence[typing.Tuple[int, int]]) \
+        -> typing.Optional[typing.List[bytes]]:
+    """
+    Reads several (address, size) ranges with as few requests to SNI as possible, instead of one snes_read each.
+    Overlapping and adjacent ranges are read together, and up to max_ranges_per_read ranges, of up to
+    SNES_READ_CHUNK_SIZE bytes in total, are sent in one request.
+
+    :return: The bytes of each range, in the order of ranges, or None if reading failed.
+    """
+    from worlds.AutoSNIClient import SNES_READ_CHUNK_SIZE
+
+    pieces = [(address + offset, min(SNES_READ_CHUNK_SIZE, size - offset))
+              for address, size in merge_read_ranges((address, size) for address, size in ranges if size > 0)
+              for offset in range(0, size, SNES_READ_CHUNK_SIZE)]
+    requests: typing.List[typing.List[typing.Tuple[int, int]]] = []
+    request_size = 0
+    for address, size in pieces:
+        if requests and len(requests[-1]) < max_ranges_per_read and request_size + size <= SNES_READ_CHUNK_SIZE:
+            requests[-1].append((address, size))
+            request_size += size
+        else:
+            requests.append([(address, size)])
+            request_size = size
+
+    data = bytearray()
+    async with ctx.snes_request_lock:
+        for request in requests:
+            response = await _snes_get_address(ctx, request)
+            if response is None:
+                return None
+            data += response
+
+    # pieces are read in order, so a range spanning several of them continues in the next one's bytes
+    starts = [address for address, _ in pieces]
+    offsets = list(itertools.accumulate((size for _, size in pieces), initial=0))
+    results: typing.List[bytes] = []
+    for address, size in ranges:
+        if size <= 0:
+            results.append(bytes())
+            continue
+        index = bisect.bisect_right(starts, address) - 1
+        offset = offsets[index] + address - starts[index]
+        results.append(bytes(data[offset:offset + size]))
+    return results
+
+
+async def snes_read_changes(ctx: SNIContext, ranges: typing.Sequence[typing.Tuple[int, int]]) \
+        -> typing.Optional[typing.Dict[typing.Tuple[int, int], bytes]]:
+    """
+    Reads the ranges like snes_read_ranges, but only returns those whose bytes changed since the last call with them
+    (or for this ROM), so a game watcher only has to handle what changed since its last tick.
+
+    :return: The bytes of each (address, size) range that changed, or None if reading failed.
+    """
+    results = await snes_read_ranges(ctx, ranges)
+    if results is None:
+        return None
+    changes: typing.Dict[typing.Tuple[int, int], bytes] = {}
+    for read_range, data in zip(ranges, results):
+        if ctx.snes_last_reads.get(read_range) != data:
+            ctx.snes_last_reads[read_range] = changes[read_range] = data
+    return changes
 
 
 async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int, bytes]]) -> bool:
@@ -623,6 +714,7 @@ async def game_watcher(ctx: SNIContext) -> None:
                 continue
 
             if not ctx.prev_rom or ctx.prev_rom != ctx.rom:
+                ctx.snes_last_reads = {}
                 ctx.locations_checked = set()
                 ctx.locations_scouted = set()
                 ctx.locations_info = {}
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import concurrent.futures
+import contextlib
 import json
 import typing
 import builtins
@@ -15,6 +17,7 @@ import io
 import collections
 import importlib
 import logging
+import time
 import warnings
 
 from argparse import Namespace
@@ -678,27 +681,119 @@ def format_SI_prefix(value, power=1000, power_labels=("", "k", "M", "G", "T", "P
     return f"{value.quantize(decimal.Decimal('1.00'))} {chaining_prefix(n, power_labels)}"
 
 
-def get_fuzzy_results(input_word: str, word_list: typing.Collection[str], limit: typing.Optional[int] = None) \
-        -> typing.List[typing.Tuple[str, int]]:
-    import jellyfish
+def _character_mask(word: str) -> int:
+    """Bit for each occurrence of each character (modulo 256) in word,
+    so the bits only one of two masks has count the characters only one of the words has."""
+    mask = 0
+    for character, count in collections.Counter(word).items():
+        code = ord(character) % 256
+        for occurrence in range(count):
+            mask |= 1 << (code + 256 * occurrence)
+    return mask
 
-    def get_fuzzy_ratio(word1: str, word2: str) -> float:
-        if word1 == word2:
+
+class FuzzyMatcher:
+    """
+    Index over a word list for get_fuzzy_results, which finds the closest words to an input in the same order as
+    ranking all of them would, but computes the edit distance only for words that could still make it into the results.
+    Build one for a word list that is searched repeatedly, like the item names of a game.
+    """
+    words: typing.Tuple[str, ...]
+    lowered: typing.Tuple[str, ...]
+    masks: typing.Tuple[int, ...]
+    """_character_mask of each lowered word"""
+    lowered_indices: typing.Dict[str, typing.List[int]]
+    by_length: typing.Dict[typing.Tuple[int, int], typing.List[int]]
+    """indices of the words by their length and the length of the lowered word"""
+    unbounded: typing.List[int]
+    """indices of the words the length and character bounds don't work for, see is_bounded"""
+
+    def __init__(self, words: typing.Iterable[str]) -> None:
+        self.words = tuple(words)
+        self.lowered = tuple(word.lower() for word in self.words)
+        self.masks = tuple(map(_character_mask, self.lowered))
+        self.lowered_indices = {}
+        self.by_length = {}
+        self.unbounded = []
+        for index, (word, lowered) in enumerate(zip(self.words, self.lowered)):
+            self.lowered_indices.setdefault(lowered, []).append(index)
+            if self.is_bounded(word):
+                self.by_length.setdefault((len(word), len(lowered)), []).append(index)
+            else:
+                self.unbounded.append(index)
+
+    @staticmethod
+    def is_bounded(word: str) -> bool:
+        """jellyfish measures the distance in grapheme clusters, which are single characters only for plain text."""
+        return word.isascii() and "\r\n" not in word
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def get_ratio(self, input_word: str, input_lowered: str, index: int) -> float:
+        import jellyfish
+
+        word = self.words[index]
+        if input_word == word:
             return 1.01
-        return (1 - jellyfish.damerau_levenshtein_distance(word1.lower(), word2.lower())
-                / max(len(word1), len(word2)))
-
-    limit = limit if limit else len(word_list)
-    return list(
-        map(
-            lambda container: (container[0], int(container[1]*100)),  # convert up to limit to int %
-            sorted(
-                map(lambda candidate: (candidate, get_fuzzy_ratio(input_word, candidate)), word_list),
-                key=lambda element: element[1],
-                reverse=True
-            )[0:limit]
-        )
-    )
+        return (1 - jellyfish.damerau_levenshtein_distance(input_lowered, self.lowered[index])
+                / max(len(input_word), len(word)))
+
+    def get_results(self, input_word: str, limit: typing.Optional[int] = None) -> typing.List[typing.Tuple[str, int]]:
+        input_lowered = input_word.lower()
+        if not limit or limit >= len(self.words) or not self.is_bounded(input_word):
+            ratios = [self.get_ratio(input_word, input_lowered, index) for index in range(len(self.words))]
+            ranked = sorted(range(len(self.words)), key=ratios.__getitem__, reverse=True)[:limit or None]
+            return [(self.words[index], int(ratios[index] * 100)) for index in ranked]
+
+        # (-ratio, index) of the best words so far, which is the order ranking all words would put them in
+        best: typing.List[typing.Tuple[float, int]] = []
+
+        def add(index: int, ratio: float) -> None:
+            bisect.insort(best, (-ratio, index))
+            if len(best) > limit:
+                best.pop()
+
+        # words that are the same, or the same lowered, can't be beaten, so look for those first
+        exact = self.lowered_indices.get(input_lowered, [])
+        for index in exact:
+            add(index, self.get_ratio(input_word, input_lowered, index))
+        for index in self.unbounded:
+            if index not in exact:
+                add(index, self.get_ratio(input_word, input_lowered, index))
+        input_length = len(input_word)
+        input_mask = _character_mask(input_lowered)
+        # Damerau-Levenshtein distance is at least the amount of characters only one of the words has, counting
+        # repeated characters, which bounds the best ratio a word can have without computing the distance.
+        # Going through the words from the best bound down, the rest can be skipped once they can't beat the results.
+        by_bound: typing.Dict[float, typing.List[int]] = {}
+        for (length, lowered_length), indices in self.by_length.items():
+            max_length = max(input_length, length) or 1
+            for index in indices:
+                mask = self.masks[index]
+                lower_bound = max((input_mask & ~mask).bit_count(), (mask & ~input_mask).bit_count())
+                by_bound.setdefault(1 - lower_bound / max_length, []).append(index)
+        for bound in sorted(by_bound, reverse=True):
+            if len(best) == limit and bound < -best[-1][0]:
+                break
+            for index in by_bound[bound]:
+                if bound == 1 and index in exact:
+                    continue  # already added
+                add(index, self.get_ratio(input_word, input_lowered, index))
+        return [(self.words[index], int(-negative_ratio * 100)) for negative_ratio, index in best]
+
+
+def get_fuzzy_results(input_word: str, word_list: typing.Union[typing.Collection[str], FuzzyMatcher],
+                      limit: typing.Optional[int] = None) -> typing.List[typing.Tuple[str, int]]:
+    """
+    Ranks the words of word_list by how closely they match input_word, as percentage (101 for a perfect match).
+
+    :param word_list: The words to rank, or a FuzzyMatcher of them to reuse.
+    :param limit: Only return this many of the best matches.
+    """
+    if not isinstance(word_list, FuzzyMatcher):
+        word_list = FuzzyMatcher(word_list)
+    return word_list.get_results(input_word, limit)
 
 
 def get_intended_text(input_text: str, possible_answers) -> typing.Tuple[str, bool, str]:
@@ -1354,3 +1449,86 @@ def get_all_causes(ex: Exception) -> str:
     top = causes[-1]
     others = "".join(f"\n{' ' * (i + 1)}Which caused: {c}" for i, c in enumerate(reversed(causes[:-1])))
     return f"{top}{others}"
+
+
+def _get_peak_rss() -> Optional[int]:
+    """Returns the peak resident set size of this process in bytes, or None if the platform does not report it."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class GenerationProfiler:
+    """
+    Records wall time, CPU time, peak RSS growth and call counts of generation stages, accumulated per stage and world.
+    Sections can be nested and run in several threads. Counted calls go to the innermost section of their thread.
+    """
+    stages: Dict[typing.Tuple[str, Optional[str]], Dict[str, Any]]
+
+    def __init__(self) -> None:
+        import threading
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def section(self, stage: str, game: Optional[str] = None) -> typing.Iterator[None]:
+        """Profiles what this thread runs in the context as part of stage, for the world of game if given."""
+        stack: typing.List[typing.Tuple[Optional[str], Dict[str, Dict[str, int]]]]
+        stack = self._local.__dict__.setdefault("stack", [])
+        counts: Dict[str, Dict[str, int]] = {}
+        stack.append((game, counts))
+        start_rss = _get_peak_rss()
+        start_cpu = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            cpu_time = time.thread_time() - start_cpu
+            end_rss = _get_peak_rss()
+            stack.pop()
+            with self._lock:
+                record = self.stages.get((stage, game))
+                if record is None:
+                    record = self.stages[stage, game] = {
+                        "stage": stage, "game": game, "calls": 0, "wall_time": 0.0, "cpu_time": 0.0,
+                        "peak_rss_delta": None if start_rss is None else 0, "counts": {}
+                    }
+                record["calls"] += 1
+                record["wall_time"] += wall_time
+                record["cpu_time"] += cpu_time
+                if start_rss is not None and end_rss is not None:
+                    record["peak_rss_delta"] += end_rss - start_rss
+                for counter, counts_per_game in counts.items():
+                    record_counts = record["counts"].setdefault(counter, {})
+                    for counted_game, count in counts_per_game.items():
+                        record_counts[counted_game] = record_counts.get(counted_game, 0) + count
+
+    def count(self, counter: str, game: Optional[str] = None) -> None:
+        """
+        Counts a call towards the current section of this thread.
+        Calls not specific to a world are counted for the section's world, or "Archipelago" outside of world sections.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            section_game, counts = stack[-1]
+            counts_per_game = counts.setdefault(counter, {})
+            game = game or section_game or "Archipelago"
+            counts_per_game[game] = counts_per_game.get(game, 0) + 1
+
+    def to_json(self, **info: Any) -> str:
+        """Returns the recorded stages in order of first completion as JSON, with info added at the top level."""
+        with self._lock:
+            return json.dumps({**info, "stages": list(self.stages.values())}, indent=1)
+
+
+def profile_section(profiler: Optional[GenerationProfiler], stage: str,
+                    game: Optional[str] = None) -> typing.ContextManager[None]:
+    """Returns profiler.section(stage, game), or a context doing nothing if there is no profiler."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.section(stage, game)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
 import multiprocessing
@@ -15,6 +16,8 @@ from Utils import restricted_loads
 from .locker import Locker, AlreadyRunningException
 
 _stop_event = Event()
+_name_tables: StaticNameTables | None = None
+"""The name tables shared by the hosters of the current autohost"""
 
 
 def stop() -> None:
@@ -113,15 +116,32 @@ def cleanup():
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+def _remove_name_tables() -> None:
+    if _name_tables:
+        _name_tables.remove()
+
+
+def replace_name_tables() -> StaticNameTables:
+    """Writes the name tables for a new set of hosters, and removes the ones of the hosters they replace."""
+    global _name_tables
+    if _name_tables:
+        _name_tables.remove()
+    else:
+        atexit.register(_remove_name_tables)
+    _name_tables = write_static_name_tables(get_static_server_data())
+    return _name_tables
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
         try:
             with Locker("autohost"):
                 cleanup()
+                static_server_data = {**get_static_server_data(), "name_tables": replace_name_tables()}
                 hosters = []
                 for x in range(config["HOSTERS"]):
-                    hoster = MultiworldInstance(config, x)
+                    hoster = MultiworldInstance(config, x, static_server_data)
                     hosters.append(hoster)
                     hoster.start()
 
@@ -180,7 +200,7 @@ def autogen(config: dict):
 
 
 class MultiworldInstance():
-    def __init__(self, config: dict, id: int):
+    def __init__(self, config: dict, id: int, static_server_data: dict):
         self.room_ids = set()
         self.process: typing.Optional[multiprocessing.Process] = None
         self.ponyconfig = config["PONY"]
@@ -190,13 +210,14 @@ class MultiworldInstance():
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
         self.name = f"MultiHoster{id}"
+        self.static_server_data = static_server_data
 
     def start(self):
         if self.process and self.process.is_alive():
             return False
 
         process = multiprocessing.Process(group=None, target=run_server_process,
-                                          args=(self.name, self.ponyconfig, get_static_server_data(),
+                                          args=(self.name, self.ponyconfig, self.static_server_data,
                                                 self.cert, self.key, self.host,
                                                 self.rooms_to_start, self.rooms_shutting_down),
                                           name=self.name)
@@ -226,5 +247,5 @@ class MultiworldInstance():
 
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
-from .customserver import run_server_process, get_static_server_data
+from .customserver import StaticNameTables, run_server_process, get_static_server_data, write_static_name_tables
 from .generate import gen_game
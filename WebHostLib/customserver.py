@@ -1,18 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import collections
 import datetime
 import functools
+import itertools
 import logging
+import mmap
 import multiprocessing
+import os
 import pickle
 import random
 import socket
+import tempfile
 import threading
 import time
 import typing
 import sys
+from array import array
+from collections.abc import Mapping
 
 import websockets
 from pony.orm import commit, db_session, select
@@ -60,8 +67,114 @@ class DBCommandProcessor(ServerCommandProcessor):
         self.ctx.logger.info(text)
 
 
+class NameTable(Mapping[int, str]):
+    """Read-only ID -> name lookup in a buffer, like a memory-mapped file shared between processes.
+    IDs are bisected in a sorted array, names are only decoded when they are looked up.
+    Unknown IDs give the missing text, like the KeyedDefaultDicts of MultiServer's Context."""
+
+    def __init__(self, buffer: memoryview, offset: int, count: int, missing: str) -> None:
+        ids_end = offset + 8 * count
+        name_offsets_end = ids_end + 4 * (count + 1)
+        self._ids = buffer[offset:ids_end].cast("q")
+        self._name_offsets = buffer[ids_end:name_offsets_end].cast("I")
+        self._names = buffer[name_offsets_end:name_offsets_end + self._name_offsets[count]]
+        self._missing = missing
+
+    def _find(self, key: object) -> int:
+        if isinstance(key, int):
+            index = bisect.bisect_left(self._ids, key)
+            if index < len(self._ids) and self._ids[index] == key:
+                return index
+        return -1
+
+    def __getitem__(self, key: int) -> str:
+        index = self._find(key)
+        if index < 0:
+            return self._missing.format(key)
+        return str(self._names[self._name_offsets[index]:self._name_offsets[index + 1]], "utf-8")
+
+    def __contains__(self, key: object) -> bool:
+        return self._find(key) >= 0
+
+    def get(self, key: int, default: typing.Optional[str] = None) -> typing.Optional[str]:
+        return self[key] if key in self else default
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def write_name_tables(file: typing.BinaryIO, tables: typing.Dict[typing.Tuple[str, str], typing.Mapping[int, str]]) \
+        -> typing.Dict[typing.Tuple[str, str], typing.Tuple[int, int]]:
+    """Writes tables for NameTable to file, returns their offsets and sizes."""
+    index: typing.Dict[typing.Tuple[str, str], typing.Tuple[int, int]] = {}
+    for key, names in tables.items():
+        ids = array("q", sorted(names))
+        encoded_names = [names[name_id].encode("utf-8") for name_id in ids]
+        name_offsets = array("I", itertools.accumulate(map(len, encoded_names), initial=0))
+        index[key] = file.tell(), len(ids)
+        file.write(ids.tobytes())
+        file.write(name_offsets.tobytes())
+        file.write(b"".join(encoded_names))
+        file.write(bytes(-file.tell() % 8))  # keep the next table's IDs aligned
+    return index
+
+
+class StaticNameTables:
+    """The ID -> name lookups of the static games package, written to a file once by the launching process.
+    Room worker processes memory-map it, so all of them share one copy of the lookups through the page cache.
+    The launching process removes the file once no new worker will open it, see autolauncher.autohost."""
+    path: str
+    index: typing.Dict[typing.Tuple[str, str], typing.Tuple[int, int]]
+    _buffer: typing.Optional[memoryview]
+
+    def __init__(self, path: str, index: typing.Dict[typing.Tuple[str, str], typing.Tuple[int, int]]) -> None:
+        self.path = path
+        self.index = index
+        self._buffer = None
+
+    @classmethod
+    def write(cls, tables: typing.Dict[typing.Tuple[str, str], typing.Mapping[int, str]]) -> StaticNameTables:
+        with tempfile.NamedTemporaryFile("wb", prefix="ap_server_names_", delete=False) as file:
+            index = write_name_tables(file, tables)
+        return cls(file.name, index)
+
+    def open(self) -> memoryview:
+        """Maps the file, if not done yet. Once mapped, the tables stay readable after the file is removed."""
+        if self._buffer is None:
+            with open(self.path, "rb") as file:
+                self._buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        return self._buffer
+
+    def remove(self) -> None:
+        """Removes the file. Processes that mapped it already keep their mapping, where the OS allows removing it."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:  # Windows does not allow removing a mapped file
+            logging.debug(f"Could not remove static name tables {self.path}: {e}")
+
+    def get(self, kind: str, game: str) -> typing.Optional[NameTable]:
+        """Returns the table of "item" or "location" names of game, if it has one."""
+        if (kind, game) not in self.index:
+            return None
+        offset, count = self.index[kind, game]
+        return NameTable(self.open(), offset, count, f"Unknown {kind} (ID:{{}})")
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        return {"path": self.path, "index": self.index}
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]) -> None:
+        self.__init__(state["path"], state["index"])
+
+
 class WebHostContext(Context):
     room_id: int
+    static_gamespackage: typing.Dict[str, typing.Any]
+    name_tables: StaticNameTables
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -88,6 +201,18 @@ class WebHostContext(Context):
             # NOTE: attributes are mutable and shared, so they will have to be copied before being modified
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
+        self.static_gamespackage = self.gamespackage
+        # copied, as _init_game_data adds the lookups of custom games
+        self.all_item_and_group_names = dict(self.all_item_and_group_names)
+        self.all_location_and_group_names = dict(self.all_location_and_group_names)
+
+    def _init_game_data(self):
+        for game_name, game_package in self.gamespackage.items():
+            if game_package is self.static_gamespackage.get(game_name):
+                # use the lookups shared by all rooms, instead of building them for this room
+                self.item_names[game_name] = self.name_tables.get("item", game_name)
+                self.location_names[game_name] = self.name_tables.get("location", game_name)
+        super()._init_game_data()
 
     async def listen_to_db_commands(self):
         cmdprocessor = DBCommandProcessor(self)
@@ -211,9 +336,35 @@ def get_static_server_data() -> dict:
         },
     }
 
+    # lookups that each room would otherwise build in Context._init_game_data
+    data["all_item_and_group_names"] = {
+        world_name: frozenset(game_package["item_name_to_id"]) | frozenset(data["item_name_groups"][world_name])
+        for world_name, game_package in data["gamespackage"].items()
+    }
+    data["all_location_and_group_names"] = {
+        world_name: frozenset(game_package["location_name_to_id"]) |
+        frozenset(data["location_name_groups"].get(world_name, []))
+        for world_name, game_package in data["gamespackage"].items()
+    }
+
     return data
 
 
+def write_static_name_tables(static_server_data: dict) -> StaticNameTables:
+    """Writes the ID -> name lookups of the games package of get_static_server_data for room workers to share.
+    The caller owns the file, and is expected to remove it once its workers are replaced."""
+    gamespackage = static_server_data["gamespackage"]
+    archipelago_package = gamespackage["Archipelago"]
+    name_tables: typing.Dict[typing.Tuple[str, str], typing.Dict[int, str]] = {}
+    for world_name, game_package in gamespackage.items():
+        for kind in ("item", "location"):
+            name_tables[kind, world_name] = names = \
+                {name_id: name for name, name_id in game_package[f"{kind}_name_to_id"].items()}
+            # Archipelago items and locations are part of each game, see Context._init_game_data
+            names.update((name_id, name) for name, name_id in archipelago_package[f"{kind}_name_to_id"].items())
+    return StaticNameTables.write(name_tables)
+
+
 def set_up_logging(room_id) -> logging.Logger:
     import os
     # logger setup
@@ -288,6 +439,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
             return ssl_context
 
     del ponyconfig
+    # map the shared name tables right away, as the launching process may remove the file once we're running
+    static_server_data["name_tables"].open()
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
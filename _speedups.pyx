@@ -92,6 +92,10 @@ cdef class LocationStore:
     cdef size_t entry_count
     cdef IndexEntry* sender_index  # 16KB/1000 players
     cdef size_t sender_index_size
+    # entries grouped by receiver, in the order of entries, built on first use by find_item and get_for_player
+    cdef size_t* receiver_entries  # 0.8MB/100k items
+    cdef IndexEntry* receiver_index  # 16KB/1000 players
+    cdef size_t receiver_index_size
     cdef list _keys  # ~36KB/1000 players, speed up iter (28 per int + 8 per list entry)
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
@@ -106,6 +110,8 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        if self.receiver_index:
+            size += sizeof(size_t) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
         return size
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
@@ -215,47 +221,72 @@ cdef class LocationStore:
         return self._items
 
     # specialized accessors
+    cdef void _build_receiver_index(self) except *:
+        cdef LocationEntry* entry
+        cdef size_t i
+        cdef size_t start = 0
+        cdef size_t max_receiver = 0
+        cdef IndexEntry* receiver_index
+        if self.receiver_index:
+            return
+        for entry in self.entries[:self.entry_count]:
+            max_receiver = max(max_receiver, entry.receiver)
+        if self.entry_count:
+            self.receiver_entries = <size_t*>self._mem.alloc(self.entry_count, sizeof(size_t))
+        receiver_index = <IndexEntry*>self._mem.alloc(max_receiver + 1, sizeof(IndexEntry))
+        # count per receiver, then place each entry after the previous ones of its receiver
+        for entry in self.entries[:self.entry_count]:
+            receiver_index[entry.receiver].count += 1
+        for i in range(max_receiver + 1):
+            receiver_index[i].start = start
+            start += receiver_index[i].count
+            receiver_index[i].count = 0
+        for i in range(self.entry_count):
+            entry = self.entries + i
+            self.receiver_entries[receiver_index[entry.receiver].start + receiver_index[entry.receiver].count] = i
+            receiver_index[entry.receiver].count += 1
+        self.receiver_index_size = max_receiver + 1
+        self.receiver_index = receiver_index
+
+    cdef IndexEntry* _get_received(self, object slot):
+        # returns NULL for slots that receive nothing
+        if slot < 0 or slot >= self.receiver_index_size:
+            return NULL
+        return self.receiver_index + <size_t>slot
+
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
-        cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef LocationEntry* entry
+        cdef IndexEntry* received
+        cdef size_t i
+        cdef list found = []
+        self._build_receiver_index()
+        for receiver in slots:
+            received = self._get_received(receiver)
+            if received:
+                for i in self.receiver_entries[received.start:received.start + received.count]:
+                    if self.entries[i].item == item:
+                        found.append(i)
+        if len(slots) > 1:
+            found.sort()  # into the order of entries
+        for i in found:
+            entry = self.entries + i
+            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
-        cdef ap_player_t receiver = slot
+        cdef LocationEntry* entry
+        cdef size_t i
+        cdef IndexEntry* received
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        self._build_receiver_index()
+        received = self._get_received(slot)
+        if received:
+            for i in self.receiver_entries[received.start:received.start + received.count]:
+                entry = self.entries + i
+                sender: int = entry.sender
+                if sender not in all_locations:
+                    all_locations[sender] = set()
+                all_locations[sender].add(entry.location)
         return all_locations
 
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
@@ -213,6 +213,7 @@ class ERPlacementState:
         source_exit.connect(target_region)
 
         self.collection_state.stale[self.world.player] = True
+        self.collection_state.dirty_items[self.world.player] = None
         self.placements.append(source_exit)
         self.pairings.append((source_exit.name, target_entrance.name))
         self.entrance_lookup.remove(target_entrance)
@@ -222,6 +223,7 @@ class ERPlacementState:
         copied_state = self.collection_state.copy()
         # simulated connection. A real connection is unsafe because the region graph is shallow-copied and would
         # propagate back to the real multiworld.
+        copied_state.unshare(self.world.player)
         copied_state.reachable_regions[self.world.player].add(target_entrance.connected_region)
         copied_state.blocked_connections[self.world.player].remove(source_exit)
         copied_state.blocked_connections[self.world.player].update(target_entrance.connected_region.exits)
@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, Any, ClassVar, Final, Generic, Never, Self, ca
 
 from typing_extensions import TypeVar, dataclass_transform, override
 
-from BaseClasses import CollectionState
+from BaseClasses import CollectionState, ItemCounts
 from NetUtils import JSONMessagePart
 
 from .options import OptionFilter
@@ -31,6 +31,13 @@ def _create_hash_fn(resolved_rule_cls: "CustomRuleRegister") -> Callable[..., in
     return hash_impl
 
 
+def _get_item_indices(world: "World", item_names: Iterable[str]) -> tuple[int, ...]:
+    """Translates item names to indices into the world's compact item counts, empty if it doesn't use them"""
+    if world.item_index is None:
+        return ()
+    return tuple(world.item_index.get_index(item_name) for item_name in item_names)
+
+
 @dataclass_transform(frozen_default=True, field_specifiers=(dataclasses.field, dataclasses.Field))
 class CustomRuleRegister(type):
     """A metaclass to contain world custom rules and automatically convert resolved rules to frozen dataclasses"""
@@ -241,6 +248,12 @@ class Rule(Generic[TWorld]):
             """Returns a mapping of item name to set of object ids, used for cache invalidation"""
             return {}
 
+        def item_dependencies_known(self) -> bool:
+            """Returns whether item_dependencies lists every item that can change this rule's result.
+            Only rules that define item_dependencies or that are cached are required to list them."""
+            return (self.caching_enabled or self.always_true or self.always_false
+                    or type(self).item_dependencies is not Rule.Resolved.item_dependencies)
+
         def region_dependencies(self) -> dict[str, set[int]]:
             """Returns a mapping of region name to set of object ids,
             used for indirect connections and cache invalidation"""
@@ -376,6 +389,10 @@ class NestedRule(Rule[TWorld], game="Archipelago"):
                         combined_deps[item_name] = {id(self), *rules}
             return combined_deps
 
+        @override
+        def item_dependencies_known(self) -> bool:
+            return self.caching_enabled or all(child.item_dependencies_known() for child in self.children)
+
         @override
         def region_dependencies(self) -> dict[str, set[int]]:
             combined_deps: dict[str, set[int]] = {}
@@ -638,6 +655,10 @@ class WrapperRule(Rule[TWorld], game="Archipelago"):
                 deps[item_name] = {id(self), *rules}
             return deps
 
+        @override
+        def item_dependencies_known(self) -> bool:
+            return self.caching_enabled or self.child.item_dependencies_known()
+
         @override
         def region_dependencies(self) -> dict[str, set[int]]:
             deps: dict[str, set[int]] = {}
@@ -696,9 +717,11 @@ class Has(Rule[TWorld], game="Archipelago"):
 
     @override
     def _instantiate(self, world: TWorld) -> Rule.Resolved:
+        item_indices = _get_item_indices(world, (self.item_name,))
         return self.Resolved(
             self.item_name,
             self.count,
+            item_indices[0] if item_indices else -1,
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -712,12 +735,17 @@ class Has(Rule[TWorld], game="Archipelago"):
     class Resolved(Rule.Resolved):
         item_name: str
         count: int = 1
+        item_index: int = dataclasses.field(default=-1, repr=False)
+        """The index of the item in the world's compact item counts, -1 if it doesn't use them"""
         skip_cache: ClassVar[bool] = True
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has
-            return state.prog_items[self.player][self.item_name] >= self.count
+            if self.item_index < 0:
+                return state.prog_items[self.player][self.item_name] >= self.count
+            counts = cast(ItemCounts, state.prog_items[self.player]).counts
+            return self.item_index < len(counts) and counts[self.item_index] >= self.count
 
         @override
         def item_dependencies(self) -> dict[str, set[int]]:
@@ -776,6 +804,7 @@ class HasAll(Rule[TWorld], game="Archipelago"):
             return Has(self.item_names[0]).resolve(world)
         return self.Resolved(
             self.item_names,
+            _get_item_indices(world, self.item_names),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -796,10 +825,19 @@ class HasAll(Rule[TWorld], game="Archipelago"):
 
     class Resolved(Rule.Resolved):
         item_names: tuple[str, ...]
+        item_indices: tuple[int, ...] = dataclasses.field(default=(), repr=False)
+        """The indices of the items in the world's compact item counts, empty if it doesn't use them"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_all
+            if self.item_indices:
+                counts = cast(ItemCounts, state.prog_items[self.player]).counts
+                length = len(counts)
+                for index in self.item_indices:
+                    if index >= length or not counts[index]:
+                        return False
+                return True
             player_prog_items = state.prog_items[self.player]
             for item in self.item_names:
                 if not player_prog_items[item]:
@@ -894,6 +932,7 @@ class HasAny(Rule[TWorld], game="Archipelago"):
             return Has(self.item_names[0]).resolve(world)
         return self.Resolved(
             self.item_names,
+            _get_item_indices(world, self.item_names),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -914,10 +953,19 @@ class HasAny(Rule[TWorld], game="Archipelago"):
 
     class Resolved(Rule.Resolved):
         item_names: tuple[str, ...]
+        item_indices: tuple[int, ...] = dataclasses.field(default=(), repr=False)
+        """The indices of the items in the world's compact item counts, empty if it doesn't use them"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_any
+            if self.item_indices:
+                counts = cast(ItemCounts, state.prog_items[self.player]).counts
+                length = len(counts)
+                for index in self.item_indices:
+                    if index < length and counts[index]:
+                        return True
+                return False
             player_prog_items = state.prog_items[self.player]
             for item in self.item_names:
                 if player_prog_items[item]:
@@ -1004,6 +1052,7 @@ class HasAllCounts(Rule[TWorld], game="Archipelago"):
             return Has(item, self.item_counts[item]).resolve(world)
         return self.Resolved(
             tuple(self.item_counts.items()),
+            _get_item_indices(world, self.item_counts),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -1016,10 +1065,19 @@ class HasAllCounts(Rule[TWorld], game="Archipelago"):
 
     class Resolved(Rule.Resolved):
         item_counts: tuple[tuple[str, int], ...]
+        item_indices: tuple[int, ...] = dataclasses.field(default=(), repr=False)
+        """The indices of the items in the world's compact item counts, empty if it doesn't use them"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_all_counts
+            if self.item_indices:
+                counts = cast(ItemCounts, state.prog_items[self.player]).counts
+                length = len(counts)
+                for index, (_, count) in zip(self.item_indices, self.item_counts):
+                    if (counts[index] if index < length else 0) < count:
+                        return False
+                return True
             player_prog_items = state.prog_items[self.player]
             for item, count in self.item_counts:
                 if player_prog_items[item] < count:
@@ -1109,6 +1167,7 @@ class HasAnyCount(Rule[TWorld], game="Archipelago"):
             return Has(item, self.item_counts[item]).resolve(world)
         return self.Resolved(
             tuple(self.item_counts.items()),
+            _get_item_indices(world, self.item_counts),
             player=world.player,
             caching_enabled=getattr(world, "rule_caching_enabled", False),
         )
@@ -1121,10 +1180,19 @@ class HasAnyCount(Rule[TWorld], game="Archipelago"):
 
     class Resolved(Rule.Resolved):
         item_counts: tuple[tuple[str, int], ...]
+        item_indices: tuple[int, ...] = dataclasses.field(default=(), repr=False)
+        """The indices of the items in the world's compact item counts, empty if it doesn't use them"""
 
         @override
         def _evaluate(self, state: CollectionState) -> bool:
             # implementation based on state.has_any_count
+            if self.item_indices:
+                counts = cast(ItemCounts, state.prog_items[self.player]).counts
+                length = len(counts)
+                for index, (_, count) in zip(self.item_indices, self.item_counts):
+                    if (counts[index] if index < length else 0) >= count:
+                        return True
+                return False
             player_prog_items = state.prog_items[self.player]
             for item, count in self.item_counts:
                 if player_prog_items[item] >= count:
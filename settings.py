@@ -535,6 +535,12 @@ class ServerOptions(Group):
     class DisableItemCheat(Bool):
         """Disallow !getitem"""
 
+    class JournalSave(Bool):
+        """
+        Append changes to a journal next to the save file, instead of rewriting the whole save file every autosave.
+        The journal gets merged into the save file whenever it grows larger than the save file.
+        """
+
     class LocationCheckPoints(int):
         """
         Client hint system
@@ -609,12 +615,19 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class SetReplyDelay(float):
+        """
+        Seconds to collect data storage changes of the same key for, before notifying of them in one SetReply.
+        0 notifies of every change right away.
+        """
+
     host: str | None = None
     port: int = 38281
     password: str | None = None
     multidata: str | None = None
     savefile: str | None = None
     disable_save: bool = False
+    journal_save: JournalSave | bool = False
     loglevel: str = "info"
     logtime: bool = False
     server_password: ServerPassword | None = None
@@ -628,6 +641,7 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    set_reply_delay: SetReplyDelay = SetReplyDelay(0)
 
 
 class GeneratorOptions(Group):
@@ -754,6 +768,11 @@ class Settings(Group):
             pass
         elif key not in dir(self) or isinstance(super().__getattribute__(key), dict):
             # settings class not loaded yet
+            if key not in _world_settings_name_cache:
+                from worlds import indexed_settings
+                if key in indexed_settings:
+                    # the world index knows which world provides the settings class, no need to load all worlds
+                    _world_settings_name_cache[key] = indexed_settings[key]
             if key not in _world_settings_name_cache:
                 # find world that provides the settings class
                 _update_cache()
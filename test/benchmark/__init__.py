@@ -5,3 +5,7 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import spheres
+    spheres.run_spheres_benchmark()
+    import progression_balancing
+    progression_balancing.run_progression_balancing_benchmark()
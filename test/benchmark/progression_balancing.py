@@ -0,0 +1,58 @@
+def run_progression_balancing_benchmark(players: int = 20) -> None:
+    """
+    Run a benchmark of balance_multiworld_progression for every game, with a multiworld of `players` copies of itself.
+    Each game is generated and balanced twice, and if both fills match, the balanced results are checked to match too.
+
+    :param players: The amount of players of each game's multiworld.
+    """
+    import gc
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from BaseClasses import MultiWorld
+    from Utils import init_logging
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from Fill import balance_multiworld_progression, distribute_items_restrictive
+    from test.general import gen_steps, setup_multiworld
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    Placements = typing.List[typing.Tuple[int, str, typing.Optional[str]]]
+
+    def get_placements(multiworld: MultiWorld) -> Placements:
+        return [(location.player, location.name, location.item.name if location.item else None)
+                for location in multiworld.get_locations()]
+
+    total = 0.0
+    for game, world_type in sorted(AutoWorld.AutoWorldRegister.world_types.items()):
+        results: typing.List[typing.Tuple[Placements, Placements]] = []
+        for _ in range(2):
+            try:
+                multiworld = setup_multiworld([world_type] * players, gen_steps, seed=0)
+                distribute_items_restrictive(multiworld)
+                call_all(multiworld, "post_fill")
+            except Exception as e:
+                logger.warning(f"Skipping {game}, could not generate: {e!r}")
+                break
+            placements = get_placements(multiworld)
+            gc.collect()
+            with TimeIt(f"{game} balance_multiworld_progression", logger) as balancing_time:
+                balance_multiworld_progression(multiworld)
+            total += balancing_time.dif
+            moved = sum(before != after for before, after in zip(placements, get_placements(multiworld)))
+            logger.info(f"{game} progression balancing changed {moved} locations.")
+            results.append((placements, get_placements(multiworld)))
+        if len(results) == 2 and results[0][0] == results[1][0] and results[0][1] != results[1][1]:
+            logger.error(f"{game} progression balancing is not deterministic.")
+
+    logger.info(f"Total: {total:.4f} seconds balancing.")
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_progression_balancing_benchmark()
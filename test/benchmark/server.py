@@ -0,0 +1,310 @@
+"""
+Load test for MultiServer. Hosts a generated multidata in-process and connects simulated clients to it, which send
+LocationChecks, Set, Get, Bounce, LocationScouts (creating hints) and !hint chat commands at a configurable rate each.
+Commands are sent on a fixed schedule, whether or not earlier ones were answered yet, and latency is measured from the
+time a command was scheduled for, so a server that falls behind shows up in the latencies instead of lowering the rate.
+Reports latency and throughput per command, the event loop lag of the server and memory per connected client,
+to find out how many clients and checks per second a server (or WebHost worker) can sustain.
+"""
+
+import argparse
+import asyncio
+import collections
+import functools
+import gc
+import logging
+import random
+import threading
+import time
+import tracemalloc
+import typing
+
+import websockets
+
+commands: typing.Dict[str, str] = {
+    # simulated command: the reply awaited to time it
+    "checks": "RoomUpdate",
+    "set": "SetReply",
+    "get": "Retrieved",
+    "bounce": "Bounced",
+    "hints": "LocationInfo",
+    # a Say of "!hint <item>", followed by a Get in the same frame, which is answered once the Say is processed
+    "say_hints": "Retrieved",
+}
+
+ReplyKey = typing.Tuple[str, typing.Any]
+
+
+class SimulatedClient:
+    """
+    A client connected to one slot, which sends commands at their rates without waiting for replies.
+    Each reply is matched to its command by the location it is about or by a benchmark_id passed along by the server.
+    """
+    number: int
+    name: str
+    game: str
+    slot: int
+    locations: typing.List[int]
+    hint_names: typing.List[str]
+    latencies: typing.Dict[str, typing.List[float]]
+    timeouts: typing.Dict[str, int]
+    receiver: typing.Optional[asyncio.Task]
+    _pending: typing.Dict[ReplyKey, typing.Deque[typing.Tuple[str, float]]]
+    _connected: typing.Optional[asyncio.Future]
+
+    def __init__(self, number: int, name: str, game: str, slot: int, locations: typing.List[int],
+                 hint_names: typing.List[str]) -> None:
+        self.number = number
+        self.name = name
+        self.game = game
+        self.slot = slot
+        self.locations = locations
+        self.hint_names = hint_names
+        self.latencies = {command: [] for command in commands}
+        self.timeouts = {command: 0 for command in commands}
+        self.receiver = None
+        self._pending = {}
+        self._connected = None
+        self._checked = 0
+        self._next_id = 0
+
+    def make_command(self, command: str) -> typing.Optional[typing.Tuple[typing.List[typing.Dict[str, typing.Any]],
+                                                                           ReplyKey]]:
+        """Returns the messages to send for a command and the key of the reply that answers them."""
+        self._next_id += 1
+        benchmark_id = self._next_id
+        if command == "checks":
+            if self._checked >= len(self.locations):
+                return None  # all checked
+            self._checked += 1
+            location = self.locations[self._checked - 1]
+            return [{"cmd": "LocationChecks", "locations": [location]}], ("location", location)
+        if command == "set":
+            return [{"cmd": "Set", "key": f"benchmark_{self.number}", "default": 0, "want_reply": True,
+                     "operations": [{"operation": "add", "value": 1}], "benchmark_id": benchmark_id}], \
+                ("id", benchmark_id)
+        if command == "get":
+            return [{"cmd": "Get", "keys": [f"benchmark_{self.number}"], "benchmark_id": benchmark_id}], \
+                ("id", benchmark_id)
+        if command == "bounce":
+            return [{"cmd": "Bounce", "tags": [f"Benchmark{self.number}"], "data": {"benchmark_id": benchmark_id}}], \
+                ("id", benchmark_id)
+        if command == "hints":
+            if not self.locations:
+                return None
+            location = random.choice(self.locations)
+            return [{"cmd": "LocationScouts", "locations": [location], "create_as_hint": 2}], ("scout", location)
+        if command == "say_hints":
+            if not self.hint_names:
+                return None
+            return [{"cmd": "Say", "text": f"!hint {random.choice(self.hint_names)}"},
+                    {"cmd": "Get", "keys": [], "benchmark_id": benchmark_id}], ("id", benchmark_id)
+        raise KeyError(command)
+
+    def _reply_keys(self, msg: typing.Dict[str, typing.Any]) -> typing.Iterator[ReplyKey]:
+        cmd = msg["cmd"]
+        if cmd == "RoomUpdate":
+            for location in msg.get("checked_locations", ()):
+                yield "location", location
+        elif cmd == "LocationInfo":
+            for item in msg["locations"]:
+                yield "scout", item.location
+        elif cmd in ("SetReply", "Retrieved"):
+            yield "id", msg.get("benchmark_id")
+        elif cmd == "Bounced":
+            yield "id", msg.get("data", {}).get("benchmark_id")
+
+    async def receive(self, socket: typing.Any) -> None:
+        from NetUtils import decode
+
+        try:
+            async for data in socket:
+                now = time.perf_counter()
+                for msg in decode(data):
+                    if msg["cmd"] == "Connected" and self._connected and not self._connected.done():
+                        self._connected.set_result(None)
+                    for key in self._reply_keys(msg):
+                        waiting = self._pending.get(key)
+                        if waiting:
+                            command, due = waiting.popleft()
+                            self.latencies[command].append(now - due)
+                            if not waiting:
+                                del self._pending[key]
+        except websockets.ConnectionClosed:
+            pass
+
+    async def connect(self, socket: typing.Any, timeout: float = 10) -> None:
+        from NetUtils import encode
+        from Utils import version_tuple
+
+        self._connected = asyncio.get_running_loop().create_future()
+        receiver = asyncio.create_task(self.receive(socket))
+        await socket.send(encode([{"cmd": "Connect", "password": "", "name": self.name, "game": self.game,
+                                   "version": version_tuple, "tags": ["AP", f"Benchmark{self.number}"],
+                                   "items_handling": 0b111, "uuid": self.number, "slot_data": False}]))
+        try:
+            await asyncio.wait_for(self._connected, timeout)
+        except asyncio.TimeoutError:
+            receiver.cancel()
+            raise TimeoutError(f"Could not connect as {self.name}.")
+        self.receiver = receiver
+
+    async def run(self, socket: typing.Any, rates: typing.Dict[str, float], duration: float,
+                  timeout: float = 10) -> None:
+        """
+        Sends each command at its rate for duration seconds, then waits up to timeout seconds for outstanding replies.
+        Commands that fall behind their schedule are sent right away, and not skipped.
+        """
+        from NetUtils import encode
+
+        now = time.perf_counter()
+        end = now + duration
+        # stagger the clients, so they don't all send at once
+        due = {command: now + random.uniform(0, 1 / rate) for command, rate in rates.items() if rate > 0}
+        while due:
+            command = min(due, key=due.__getitem__)
+            if due[command] >= end:
+                break
+            delay = due[command] - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            made = self.make_command(command)
+            if made is None:
+                del due[command]
+                continue
+            msgs, key = made
+            self._pending.setdefault(key, collections.deque()).append((command, due[command]))
+            await socket.send(encode(msgs))
+            due[command] += 1 / rates[command]
+
+        deadline = time.perf_counter() + timeout
+        while self._pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        for waiting in self._pending.values():
+            for command, _ in waiting:
+                self.timeouts[command] += 1
+        self._pending.clear()
+
+
+def percentile(values: typing.List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_server_benchmark(multidata: str, clients: int = 10, duration: float = 10,
+                         rates: typing.Optional[typing.Dict[str, float]] = None) -> None:
+    """
+    Host multidata and run `clients` simulated clients against it for `duration` seconds, then log the results.
+
+    :param multidata: Path to the .archipelago or .zip to host.
+    :param clients: The amount of clients, spread evenly over the slots. Clients of the same slot check different
+        locations.
+    :param duration: Seconds to send commands for, after all clients are connected.
+    :param rates: Commands per second per client, for each of checks, set, get, bounce, hints and say_hints.
+    """
+    from MultiServer import Context, server, server_per_message_deflate_factory
+    from NetUtils import SlotType
+    from Utils import format_SI_prefix, init_logging
+
+    init_logging("Server Benchmark")
+    logger = logging.getLogger("Benchmark")
+    rates = {command: 1.0 for command in commands} if rates is None else rates
+
+    ctx = Context("localhost", 0, "", "", 0, 0, False, logger=logging.getLogger("Server"))
+    ctx.load(multidata)
+    ctx.init_save(False)
+    # don't log every item sent and connection made
+    logging.getLogger("Server").setLevel(logging.WARNING)
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+
+    server_loop = asyncio.new_event_loop()
+    server_ready = threading.Event()
+    loop_lag: typing.List[float] = []
+
+    async def host() -> None:
+        ctx.server = websockets.serve(functools.partial(server, ctx=ctx), ctx.host, 0, max_size=None,
+                                      extensions=[server_per_message_deflate_factory])
+        ws_server = await ctx.server
+        ctx.port = ws_server.sockets[0].getsockname()[1]
+        server_ready.set()
+        interval = 0.01
+        while not ctx.exit_event.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            loop_lag.append(time.perf_counter() - start - interval)
+        ws_server.close()
+        await ws_server.wait_closed()
+
+    server_thread = threading.Thread(target=server_loop.run_until_complete, args=(host(),), name="Server")
+    server_thread.start()
+    server_ready.wait()
+
+    players = [slot for slot, slot_info in ctx.slot_info.items() if slot_info.type == SlotType.player]
+    received_items: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
+    for slot_locations in ctx.locations.values():
+        for item_id, receiving_slot, _ in slot_locations.values():
+            received_items[receiving_slot].add(item_id)
+    simulated_clients: typing.List[SimulatedClient] = []
+    for number in range(clients):
+        slot = players[number % len(players)]
+        # clients of the same slot share its locations between them
+        slot_clients = len(range(number % len(players), clients, len(players)))
+        locations = sorted(ctx.locations[slot])[number // len(players)::slot_clients]
+        # hint for the items the slot receives, by name, like a player would
+        hint_names = sorted({ctx.item_names[ctx.games[slot]][item_id] for item_id in received_items[slot]})
+        simulated_clients.append(SimulatedClient(number, ctx.player_names[0, slot], ctx.games[slot], slot,
+                                                 locations, hint_names))
+
+    async def run_clients() -> None:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        sockets = [await websockets.connect(f"ws://localhost:{ctx.port}", max_size=None)
+                   for _ in simulated_clients]
+        for simulated_client, socket in zip(simulated_clients, sockets):
+            await simulated_client.connect(socket)
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        logger.info(f"Connected {clients} clients, {format_SI_prefix(memory / clients, 1024)}B per client "
+                    f"(for both ends of its connection).")
+
+        loop_lag.clear()
+        await asyncio.gather(*(simulated_client.run(socket, rates, duration)
+                               for simulated_client, socket in zip(simulated_clients, sockets)))
+
+        for command in commands:
+            latencies = [latency for simulated_client in simulated_clients
+                         for latency in simulated_client.latencies[command]]
+            timeouts = sum(simulated_client.timeouts[command] for simulated_client in simulated_clients)
+            if latencies or timeouts:
+                logger.info(f"{command:>9}: {len(latencies) / duration:8.1f}/s, "
+                            f"p50 {percentile(latencies, 0.5) * 1000:7.2f} ms, "
+                            f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms, {timeouts} timed out")
+        logger.info(f"Server event loop lag: p50 {percentile(loop_lag, 0.5) * 1000:.2f} ms, "
+                    f"p99 {percentile(loop_lag, 0.99) * 1000:.2f} ms, max {max(loop_lag, default=0) * 1000:.2f} ms")
+
+        for simulated_client, socket in zip(simulated_clients, sockets):
+            await socket.close()
+            simulated_client.receiver.cancel()
+
+    try:
+        asyncio.run(run_clients())
+    finally:
+        server_loop.call_soon_threadsafe(ctx.exit_event.set)
+        server_thread.join()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("multidata", help="Path to the .archipelago or .zip to host.")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to send commands for.")
+    for simulated_command in commands:
+        parser.add_argument(f"--{simulated_command}", type=float, default=1.0, help="Per second per client.")
+    args = parser.parse_args()
+    run_server_benchmark(args.multidata, args.clients, args.duration,
+                         {command: getattr(args, command) for command in commands})
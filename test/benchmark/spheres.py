@@ -0,0 +1,99 @@
+def run_spheres_benchmark(players: int = 20) -> None:
+    """
+    Run a benchmark comparing MultiWorld.get_spheres and get_sendable_spheres against a plain rescan of all remaining
+    locations every sphere, which is what they did before only rechecking locations that could have changed.
+    Every game is benchmarked with a multiworld of `players` copies of itself, and the results are checked to be equal.
+
+    :param players: The amount of players of each game's multiworld.
+    """
+    import gc
+    import logging
+    import typing
+
+    from time_it import TimeIt
+
+    from BaseClasses import CollectionState, Location, MultiWorld
+    from Utils import init_logging
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+    from Fill import distribute_items_restrictive
+    from test.general import gen_steps, setup_multiworld
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    def rescan_spheres(multiworld: MultiWorld) -> typing.Iterator[typing.Set[Location]]:
+        state = CollectionState(multiworld)
+        locations = set(multiworld.get_filled_locations())
+
+        while locations:
+            sphere = {location for location in locations if location.can_reach(state)}
+            yield sphere
+            if not sphere:
+                yield locations
+                break
+            for location in sphere:
+                state.collect(location.item, True, location)
+            locations -= sphere
+
+    def rescan_sendable_spheres(multiworld: MultiWorld) -> typing.Iterator[typing.Set[Location]]:
+        state = CollectionState(multiworld)
+        locations: typing.Set[Location] = set()
+        events: typing.Set[Location] = set()
+        for location in multiworld.get_filled_locations():
+            if type(location.item.code) is int and type(location.address) is int:
+                locations.add(location)
+            else:
+                events.add(location)
+
+        while locations:
+            done_events: typing.Set[typing.Optional[Location]] = {None}
+            while done_events:
+                done_events = set()
+                for event in events:
+                    if event.can_reach(state):
+                        state.collect(event.item, True, event)
+                        done_events.add(event)
+                events -= done_events
+
+            sphere = {location for location in locations if location.can_reach(state)}
+            yield sphere
+            if not sphere:
+                yield locations
+                break
+            for location in sphere:
+                state.collect(location.item, True, location)
+            locations -= sphere
+
+    totals: typing.Dict[str, float] = {"rescan": 0.0, "search": 0.0}
+    for game, world_type in sorted(AutoWorld.AutoWorldRegister.world_types.items()):
+        try:
+            multiworld = setup_multiworld([world_type] * players, gen_steps, seed=0)
+            distribute_items_restrictive(multiworld)
+            call_all(multiworld, "post_fill")
+        except Exception as e:
+            logger.warning(f"Skipping {game}, could not generate: {e!r}")
+            continue
+
+        for name, reference, implementation in (
+            ("get_spheres", rescan_spheres, MultiWorld.get_spheres),
+            ("get_sendable_spheres", rescan_sendable_spheres, MultiWorld.get_sendable_spheres),
+        ):
+            gc.collect()
+            with TimeIt(f"{game} {name} rescan", logger) as rescan_time:
+                expected = list(reference(multiworld))
+            gc.collect()
+            with TimeIt(f"{game} {name} search", logger) as search_time:
+                result = list(implementation(multiworld))
+            if result != expected:
+                logger.error(f"{game} {name} produced different spheres than the rescan.")
+            totals["rescan"] += rescan_time.dif
+            totals["search"] += search_time.dif
+
+    logger.info(f"Total: {totals['rescan']:.4f} seconds rescanning, {totals['search']:.4f} seconds searching.")
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_spheres_benchmark()
@@ -117,6 +117,22 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(locations[0].item, items[0])
         self.assertEqual(locations[1].item, items[1])
 
+    def test_always_allow_fill(self):
+        """Tests `fill_restrictive` places into unreachable locations that always allow the item"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 2, 2)
+        items = player1.prog_items
+        locations = player1.locations
+
+        set_rule(locations[0], lambda state: False)
+        set_rule(locations[1], lambda state: False)
+        locations[1].always_allow = lambda state, item: item == items[1]
+        fill_restrictive(multiworld, multiworld.state, player1.locations.copy(), player1.prog_items.copy(),
+                         allow_partial=True)
+
+        self.assertIsNone(locations[0].item)
+        self.assertEqual(locations[1].item, items[1])
+
     def test_partial_fill(self):
         """Tests that `fill_restrictive` returns unfilled locations"""
         multiworld = generate_test_multiworld()
@@ -4,7 +4,7 @@ from typing import Any, ClassVar, cast
 
 from typing_extensions import override
 
-from BaseClasses import CollectionState, Item, ItemClassification, Location, MultiWorld, Region
+from BaseClasses import CollectionState, Item, ItemClassification, ItemCounts, ItemIndex, Location, MultiWorld, Region
 from NetUtils import JSONMessagePart
 from Options import Choice, FreeText, Option, OptionSet, PerGameCommonOptions, Toggle
 from rule_builder.cached_world import CachedRuleBuilderWorld
@@ -567,6 +567,129 @@ class TestCacheDisabled(RuleBuilderTestCase):
         self.assertTrue(location.can_reach(self.state))
 
 
+class TestIncrementalReachability(RuleBuilderTestCase):
+    multiworld: MultiWorld  # pyright: ignore[reportUninitializedInstanceVariable]
+    world: World  # pyright: ignore[reportUninitializedInstanceVariable]
+    state: CollectionState  # pyright: ignore[reportUninitializedInstanceVariable]
+    checks: list[str]  # pyright: ignore[reportUninitializedInstanceVariable]
+    player: int = 1
+
+    @override
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.multiworld = setup_solo_multiworld(self.world_cls, seed=0)
+        world = self.multiworld.worlds[1]
+        world.incremental_region_reachability = True
+        self.world = world
+        self.state = self.multiworld.state
+        self.checks = []
+
+        region1 = Region("Region 1", self.player, self.multiworld)
+        region2 = Region("Region 2", self.player, self.multiworld)
+        region3 = Region("Region 3", self.player, self.multiworld)
+        region4 = Region("Region 4", self.player, self.multiworld)
+        self.multiworld.regions.extend([region1, region2, region3, region4])
+
+        world.create_entrance(region1, region2, Has("Item 1"))
+        world.create_entrance(region1, region3, CanReachRegion("Region 2") & Has("Item 2"))
+
+        def declared_rule(state: CollectionState) -> bool:
+            self.checks.append("declared")
+            return state.has("Item 3", self.player)
+
+        declared = region1.connect(region4, rule=declared_rule)
+        declared.item_dependencies = {"Item 3"}
+
+    def test_dependencies(self) -> None:
+        self.assertEqual(self.world.get_entrance("Region 1 -> Region 2").get_item_dependencies(), {"Item 1"})
+        self.assertIsNone(self.world.get_entrance("Region 1 -> Region 3").get_item_dependencies())
+        self.assertEqual(self.world.get_entrance("Region 1 -> Region 4").get_item_dependencies(), {"Item 3"})
+
+    def test_undeclared_dependencies(self) -> None:
+        """Ensure custom rules that don't define item_dependencies are treated as unknown without caching"""
+        class HasItem3(Rule.Resolved):
+            @override
+            def _evaluate(self, state: CollectionState) -> bool:
+                return state.has("Item 3", self.player)
+
+        undeclared = HasItem3(player=self.player)
+        combined = And.Resolved((Has("Item 1").resolve(self.world), undeclared), player=self.player)
+        entrance = self.world.get_entrance("Region 1 -> Region 2")
+        for rule in (undeclared, combined, Filtered.Resolved(undeclared, player=self.player)):
+            entrance.access_rule = rule
+            self.assertIsNone(entrance.get_item_dependencies(), rule)
+        entrance.access_rule = HasItem3(player=self.player, caching_enabled=True)
+        self.assertEqual(entrance.get_item_dependencies(), set())
+
+    def test_only_affected_entrances_checked(self) -> None:
+        region4 = self.world.get_region("Region 4")
+        self.assertFalse(region4.can_reach(self.state))
+        self.assertEqual(self.checks, ["declared"])
+
+        self.state.collect(self.world.create_item("Item 2"))
+        self.state.collect(self.world.create_item("Item 1"))
+        self.assertTrue(self.world.get_region("Region 3").can_reach(self.state))
+        self.assertEqual(self.checks, ["declared"])
+
+        self.state.collect(self.world.create_item("Item 3"))
+        self.assertTrue(region4.can_reach(self.state))
+        self.assertEqual(self.checks, ["declared", "declared"])
+
+    def test_copy_keeps_pending_items(self) -> None:
+        region2 = self.world.get_region("Region 2")
+        self.assertFalse(region2.can_reach(self.state))
+        self.state.collect(self.world.create_item("Item 1"))
+        self.assertTrue(region2.can_reach(self.state.copy()))
+
+
+class TestSpheres(RuleBuilderTestCase):
+    def test_spheres(self) -> None:
+        """Ensure locations are found again after their region or items change, including through events"""
+        multiworld = setup_solo_multiworld(self.world_cls, seed=0)
+        world = multiworld.worlds[1]
+        region1 = Region("Region 1", 1, multiworld)
+        region2 = Region("Region 2", 1, multiworld)
+        multiworld.regions.extend([region1, region2])
+        world.create_entrance(region1, region2, Has("Item 1"))
+        locations = {
+            name: RuleBuilderLocation(1, name, world.location_name_to_id[name], region)
+            for name, region in (("Location 1", region1), ("Location 2", region2), ("Location 3", region1),
+                                 ("Location 4", region1), ("Location 5", region1))
+        }
+        event = RuleBuilderLocation(1, "Event", None, region1)
+        for location in (*locations.values(), event):
+            assert location.parent_region is not None
+            location.parent_region.locations.append(location)
+        world.set_rule(locations["Location 3"], Has("Item 2"))
+        world.set_rule(locations["Location 4"], CanReachRegion("Region 2") & Has("Event Item"))
+        world.set_rule(event, Has("Item 3"))
+        world.set_rule(locations["Location 5"], Has("Item 5"))
+        for index, location in enumerate(locations.values(), start=1):
+            location.place_locked_item(world.create_item(f"Item {index}"))
+        event.place_locked_item(RuleBuilderItem("Event Item", ItemClassification.progression, None, 1))
+
+        self.assertEqual(locations["Location 3"].get_item_dependencies(), {"Item 2"})
+        self.assertIsNone(locations["Location 4"].get_item_dependencies())
+        self.assertEqual(list(multiworld.get_spheres()), [
+            {locations["Location 1"]},
+            {locations["Location 2"]},
+            {locations["Location 3"]},
+            {event},
+            {locations["Location 4"]},
+            set(),
+            {locations["Location 5"]},
+        ])
+        self.assertEqual(list(multiworld.get_sendable_spheres()), [
+            {locations["Location 1"]},
+            {locations["Location 2"]},
+            {locations["Location 3"]},
+            {locations["Location 4"]},
+            set(),
+            {locations["Location 5"]},
+        ])
+
+
 class TestRules(RuleBuilderTestCase):
     multiworld: MultiWorld  # pyright: ignore[reportUninitializedInstanceVariable]
     world: World  # pyright: ignore[reportUninitializedInstanceVariable]
@@ -750,6 +873,21 @@ class TestRules(RuleBuilderTestCase):
         self.assertEqual(self.multiworld.can_beat_game(self.state), True)
 
 
+class TestCompactRules(TestRules):
+    @override
+    def _create_world_class(self) -> None:
+        super()._create_world_class()
+        # what AutoWorldRegister does for worlds with compact_item_counts
+        self.world_cls.compact_item_counts = True
+        self.world_cls.item_index = ItemIndex(self.world_cls.item_name_to_id)
+
+    def test_uses_item_counts(self) -> None:
+        self.assertIsInstance(self.state.prog_items[self.player], ItemCounts)
+        resolved_rule = Has("Item 2").resolve(self.world)
+        assert isinstance(resolved_rule, Has.Resolved)
+        self.assertEqual(resolved_rule.item_index, 1)
+
+
 class TestSerialization(RuleBuilderTestCase):
     maxDiff: int | None = None
 
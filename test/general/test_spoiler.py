@@ -0,0 +1,23 @@
+import unittest
+
+from BaseClasses import Item, ItemClassification, Location, Spoiler
+from . import generate_test_multiworld
+
+
+class TestPlaythrough(unittest.TestCase):
+    def test_culls_unneeded_items(self) -> None:
+        """Ensure the playthrough only keeps the items needed to beat the game, however they are batched."""
+        multiworld = generate_test_multiworld()
+        menu = multiworld.get_region("Menu", 1)
+        needed = {"Item 3", "Item 10", "Item 11"}
+        for index in range(16):
+            location = Location(1, f"Location {index}", index, menu)
+            menu.locations.append(location)
+            location.place_locked_item(Item(f"Item {index}", ItemClassification.progression, index, 1))
+        multiworld.completion_condition[1] = lambda state: state.has_all(needed, 1)
+
+        spoiler = Spoiler(multiworld)
+        spoiler.create_playthrough(create_paths=False)
+        self.assertEqual(spoiler.playthrough["1"], {
+            f"Location {index}": f"Item {index}" for index in (3, 10, 11)
+        })
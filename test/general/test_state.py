@@ -1,7 +1,8 @@
 import unittest
 
+from BaseClasses import CollectionState, Item, ItemClassification, ItemCounts, ItemIndex, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +28,53 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestCopy(unittest.TestCase):
+    def test_copy_shares_until_mutated(self) -> None:
+        """Ensure copies share untouched players' structures, but mutations don't leak between states."""
+        multiworld = generate_test_multiworld(2)
+        menu = multiworld.get_region("Menu", 1)
+        other = Region("Other", 1, multiworld)
+        multiworld.regions.append(other)
+        menu.connect(other, rule=lambda state: state.has("Key", 1))
+        key = Item("Key", ItemClassification.progression, None, 1)
+
+        state = CollectionState(multiworld)
+        self.assertFalse(other.can_reach(state))
+        copy = state.copy()
+        self.assertIs(copy.prog_items[2], state.prog_items[2])
+
+        copy.collect(key, True)
+        self.assertTrue(other.can_reach(copy))
+        self.assertFalse(other.can_reach(state))
+        self.assertEqual(state.count("Key", 1), 0)
+        self.assertIs(copy.prog_items[2], state.prog_items[2])
+
+        state.add_item("Key", 1, 2)
+        self.assertEqual(copy.count("Key", 1), 1)
+        self.assertEqual(state.count("Key", 1), 2)
+
+
+class TestItemCounts(unittest.TestCase):
+    def test_counter_behavior(self) -> None:
+        """Ensure ItemCounts behaves like the Counter it replaces."""
+        index = ItemIndex(["A", "B"])
+        counts = ItemCounts(index)
+        self.assertEqual(counts["A"], 0)
+        self.assertEqual(counts["Unknown"], 0)
+        self.assertNotIn("A", counts)
+        self.assertEqual(len(counts), 0)
+
+        counts["B"] += 2
+        counts["C"] += 1
+        self.assertEqual(index.get_index("C"), 2)
+        self.assertEqual(dict(counts), {"B": 2, "C": 1})
+        self.assertEqual(counts.total(), 3)
+
+        copy = counts.copy()
+        del counts["B"]
+        self.assertNotIn("B", counts)
+        self.assertEqual(copy["B"], 2)
+        self.assertEqual(copy.count_index(index.get_index("C")), 1)
+        self.assertEqual(ItemCounts(ItemIndex()).count_index(index.get_index("C")), 0)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import worlds
+from worlds.AutoWorld import AutoWorldRegister, World
+
+
+class TestWorldIndex(unittest.TestCase):
+    def test_index_round_trip(self) -> None:
+        """Ensure the world index maps each game of a world folder to that folder, so it can be loaded on its own."""
+        worlds.load_all_worlds()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.object(worlds, "world_index_path", os.path.join(temp_dir, "world_index.json")):
+                worlds.write_world_index()
+                games, settings = worlds.read_world_index()
+
+        for game, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest(game):
+                if world_type.__module__.split(".")[0] != "worlds" or game not in games:
+                    continue  # not from a world folder
+                self.assertEqual(world_type.__module__.split(".")[1], Path(games[game].path).stem)
+                if world_type.settings_key in settings:
+                    self.assertEqual(settings[world_type.settings_key],
+                                     f"{world_type.__module__}.{world_type.__name__}")
+        self.assertIn(AutoWorldRegister.world_types["Archipelago"].game, games)
+
+    def test_data_package_cache(self) -> None:
+        """Ensure the cached data packages are what the worlds would build, and are used while nothing changed."""
+        worlds.load_all_worlds()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.object(worlds, "data_package_cache_path", os.path.join(temp_dir, "data_package.pickle")):
+                built = worlds.build_network_data_package()["games"]
+                with patch.object(World, "get_data_package_data", side_effect=AssertionError("not cached")):
+                    cached = worlds.build_network_data_package()["games"]
+                # changing core code that shapes the data packages outdates all of them
+                core_source = os.path.join(temp_dir, "core.py")
+                with open(core_source, "w") as core_file:
+                    core_file.write("changed")
+                with patch.object(worlds, "data_package_core_sources", (core_source,)):
+                    self.assertEqual(worlds.read_data_package_cache()["games"], {})
+
+        for game, world_type in AutoWorldRegister.world_types.items():
+            with self.subTest(game):
+                if worlds.find_world_source(world_type):
+                    self.assertEqual(cached[game], built[game])
+                    self.assertEqual(cached[game]["checksum"], world_type.get_data_package_data()["checksum"])
+                else:
+                    self.assertNotIn(game, cached)
@@ -111,6 +111,10 @@ class Base:
                              [(4, 9, 99, 3, 0), (5, 9, 99, 5, 0)])
             self.assertEqual(sorted(self.store.find_item(set(range(2048)), 13)),
                              [(1, 13, 13, 1, 0)])
+            # results are in the order of the store
+            self.assertEqual(list(self.store.find_item({5, 4, 3}, 99)),
+                             [(sender, location, *data) for sender, locations in self.store.items()
+                              for location, data in locations.items() if data[0] == 99])
 
         def test_get_for_player(self) -> None:
             self.assertEqual(self.store.get_for_player(3), {4: {9}})
@@ -0,0 +1,57 @@
+import typing
+import unittest
+import zlib
+from unittest.mock import patch
+
+from NetUtils import Hint, LazyMultiData, MultiDataSections, NetworkSlot, SlotType, decode_multidata, \
+    encode_multidata, multidata_format_version
+from Utils import VersionException, restricted_dumps
+
+
+class TestMultiData(unittest.TestCase):
+    multidata: typing.Dict[str, typing.Any] = {
+        "slot_data": {1: {"option": 1}, 2: {"option": 2}},
+        "slot_info": {1: NetworkSlot("Player1", "Game", SlotType.player),
+                      2: NetworkSlot("Player2", "Game", SlotType.player)},
+        "locations": {1: {10: (100, 2, 0)}, 2: {20: (200, 1, 1)}},
+        "er_hint_data": {1: {10: "Entrance"}},
+        "precollected_hints": {1: {Hint(2, 1, 10, 100, False)}},
+        "spheres": [{1: {10}}, {2: {20}}],
+        "seed_name": "seed",
+    }
+
+    def test_round_trip(self) -> None:
+        """Ensure multidata decodes to what was encoded, including what a world might add through modify_multidata."""
+        multidata = {**self.multidata, "custom": [1, 2, 3]}
+        data = encode_multidata(multidata)
+        self.assertEqual(data[0], multidata_format_version)
+        decoded = decode_multidata(data)
+        self.assertIsInstance(decoded, LazyMultiData)
+        self.assertEqual(set(decoded), set(multidata))
+        for key, value in multidata.items():
+            if isinstance(decoded[key], MultiDataSections):
+                self.assertEqual(dict(decoded[key]), value)
+            else:
+                self.assertEqual(decoded[key], value)
+        # re-encoding lazily decoded multidata, as WebHost does on upload
+        self.assertEqual(decode_multidata(encode_multidata(decoded))["locations"], multidata["locations"])
+
+    def test_lazy_sections(self) -> None:
+        """Ensure sections are only decoded on first access, and each slot's slot_data on its own."""
+        multidata = decode_multidata(encode_multidata(self.multidata))
+        with patch.object(LazyMultiData, "decode_section", autospec=True,
+                          side_effect=LazyMultiData.decode_section) as decode_section:
+            self.assertEqual(multidata["seed_name"], "seed")
+            self.assertEqual(list(multidata["slot_data"]), [1, 2])
+            self.assertEqual(decode_section.call_count, 0)
+            self.assertEqual(multidata["slot_data"][2], {"option": 2})
+            self.assertEqual(multidata["slot_data"][2], {"option": 2})
+            self.assertEqual(decode_section.call_count, 1)
+            self.assertEqual(multidata.pop("locations"), self.multidata["locations"])
+            self.assertNotIn("locations", multidata)
+            self.assertEqual(decode_section.call_count, 2)
+
+    def test_old_format(self) -> None:
+        data = bytes([3]) + zlib.compress(restricted_dumps(self.multidata))
+        self.assertEqual(decode_multidata(data), self.multidata)
+        self.assertRaises(VersionException, decode_multidata, bytes([multidata_format_version + 1]) + data[1:])
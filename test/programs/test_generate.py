@@ -137,3 +137,26 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+
+class TestReadPlayerFiles(unittest.TestCase):
+    def test_parallel_read(self):
+        """Ensure reading player files in worker processes gives the same results as reading them one by one,
+        including which are invalid."""
+        from unittest.mock import patch
+
+        data_dir = Path(__file__).parent / "data"
+        with TemporaryDirectory() as temp_dir:
+            invalid_path = os.path.join(temp_dir, "invalid.yaml")
+            with open(invalid_path, "w") as invalid_file:
+                invalid_file.write("name: Player\nname: Player\n")
+            paths = [str(path) for path in sorted(data_dir.glob("*/*.yaml"))] + [invalid_path]
+            sequential = Generate.read_player_files(paths)
+            with patch("os.cpu_count", return_value=2), patch.object(Generate, "parallel_read_size", 0):
+                parallel = Generate.read_player_files(paths)
+
+        self.assertEqual(sequential[:-1], parallel[:-1])
+        self.assertTrue(all(error is None for yamls, error in parallel[:-1]))
+        yamls, (trace, causes) = parallel[-1]
+        self.assertIsNone(yamls)
+        self.assertIn("Duplicate key name", causes)
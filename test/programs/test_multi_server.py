@@ -1,5 +1,14 @@
+import asyncio
+import os
+import tempfile
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+from unittest.mock import patch
+
+from typing_extensions import override
+
+from MultiServer import Client, Context, ServerCommandProcessor, process_client_cmd, queue_new_items, send_items_to
+from NetUtils import ClientStatus, GamesPackage, Hint, HintStatus, NetworkItem, decode, encode, index_spheres
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +47,292 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+def new_context() -> Context:
+    # game data is not needed here, and can only be loaded once per process
+    with patch.object(Context, "_load_game_data"):
+        return Context("localhost", 0, "", "", 0, 0, False)
+
+
+class FakeSocket:
+    open = True
+
+    def __init__(self) -> None:
+        self.sent: typing.List[typing.Any] = []
+
+    async def send(self, msg: str) -> None:
+        self.sent.append(decode(msg))
+
+
+def broadcast(sockets: typing.Iterable[FakeSocket], msg: str) -> None:
+    for socket in sockets:
+        socket.sent.append(decode(msg))
+
+
+def connect(ctx: Context, team: int, slot: int) -> typing.Tuple[Client, FakeSocket]:
+    socket = FakeSocket()
+    client = Client(typing.cast(typing.Any, socket), ctx)
+    client.auth = True
+    client.team = team
+    client.slot = slot
+    ctx.clients.setdefault(team, {}).setdefault(slot, []).append(client)
+    return client, socket
+
+
+class TestItemDelivery(unittest.TestCase):
+    ctx: Context
+
+    @override
+    def setUp(self) -> None:
+        self.ctx = new_context()
+
+    def test_coalesced_delivery(self) -> None:
+        """Ensure items received in one event loop iteration reach only their slot's clients, in one message."""
+        _, receiver = connect(self.ctx, 0, 1)
+        _, bystander = connect(self.ctx, 0, 2)
+
+        async def receive_items() -> None:
+            for location in range(3):
+                send_items_to(self.ctx, 0, 1, NetworkItem(location + 100, location, 2, 0))
+                queue_new_items(self.ctx)
+            # let the flush and the send tasks it starts run
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        asyncio.run(receive_items())
+        self.assertEqual(len(receiver.sent), 1)
+        (message,), = receiver.sent
+        self.assertEqual(message["cmd"], "ReceivedItems")
+        self.assertEqual(message["index"], 0)
+        self.assertEqual([item.item for item in message["items"]], [100, 101, 102])
+        self.assertEqual(bystander.sent, [])
+        self.assertFalse(self.ctx.pending_item_slots)
+
+
+class TestJournalSave(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.save_filename = os.path.join(self.temp_dir.name, "test.apsave")
+
+    @override
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def load(self, journal: bool = True) -> Context:
+        ctx = new_context()
+        ctx.connect_names = {"Player1": (0, 1)}
+        ctx.save_filename = self.save_filename
+        with patch.object(Context, "_start_async_saving"):
+            ctx.init_save(True, journal)
+        self.addCleanup(lambda: ctx.journal_file and ctx.journal_file.close())
+        return ctx
+
+    def test_replay(self) -> None:
+        """Ensure changes that only made it into the journal are there after loading again."""
+        ctx = self.load()
+        send_items_to(ctx, 0, 1, NetworkItem(100, 1, 1, 0))
+        ctx.location_checks[0, 1].add(1)
+        ctx.journal_location_checks(0, 1, {1})
+        ctx.stored_data["key"] = "old"
+        ctx.journal_stored_data("key")
+        self.assertTrue(ctx._save())  # pyright: ignore[reportPrivateUsage]
+        send_items_to(ctx, 0, 1, NetworkItem(101, 2, 1, 0))
+        ctx.location_checks[0, 1].add(2)
+        ctx.journal_location_checks(0, 1, {2})
+        ctx.stored_data["key"] = "new"
+        ctx.journal_stored_data("key")
+        ctx.client_game_state[0, 1] = ClientStatus.CLIENT_GOAL
+        self.assertTrue(ctx._save())  # pyright: ignore[reportPrivateUsage]
+        assert ctx.journal_file is not None
+        ctx.journal_file.write(b"\xff\x00")  # entry cut off by a crash
+        ctx.journal_file.close()
+
+        loaded_ctx = self.load()
+        self.assertEqual([item.item for item in loaded_ctx.received_items[0, 1, True]], [100, 101])
+        self.assertEqual(loaded_ctx.location_checks[0, 1], {1, 2})
+        self.assertEqual(loaded_ctx.stored_data, {"key": "new"})
+        self.assertEqual(loaded_ctx.client_game_state[0, 1], ClientStatus.CLIENT_GOAL)
+        # loading compacted the journal into the save file, so a regular save can be loaded from here
+        assert loaded_ctx.journal_file is not None
+        loaded_ctx.journal_file.close()
+        self.assertEqual(self.load(False).stored_data, {"key": "new"})
+
+    def test_compaction(self) -> None:
+        """Ensure items appended while compacting are not received twice, and outdated journals are ignored."""
+        ctx = self.load()
+        send_items_to(ctx, 0, 1, NetworkItem(100, 1, 1, 0))
+        ctx._save()  # pyright: ignore[reportPrivateUsage]
+        assert ctx.journal_file is not None
+        ctx.journal_file.close()
+        with open(ctx.journal_filename, "rb") as f:
+            outdated_journal = f.read()
+        ctx._compact_journal()  # pyright: ignore[reportPrivateUsage]
+        # as if the item got appended again while compacting, after the counts were taken
+        ctx.journal_item_counts[0, 1, True] = 0
+        ctx.stored_data["key"] = "new"
+        ctx.journal_stored_data("key")
+        ctx._save()  # pyright: ignore[reportPrivateUsage]
+        assert ctx.journal_file is not None
+        ctx.journal_file.close()
+        self.assertEqual([item.item for item in self.load().received_items[0, 1, True]], [100])
+
+        with open(ctx.journal_filename, "wb") as f:
+            f.write(outdated_journal)
+        self.assertEqual([item.item for item in self.load().received_items[0, 1, True]], [100])
+
+
+class TestDataStorage(unittest.TestCase):
+    ctx: Context
+
+    @override
+    def setUp(self) -> None:
+        self.ctx = new_context()
+
+    def run_commands(self, *commands: typing.Tuple[Client, typing.Dict[str, typing.Any]]) -> None:
+        async def run() -> None:
+            for client, args in commands:
+                await process_client_cmd(self.ctx, client, args)
+            # let the sends and delayed SetReplies run
+            await asyncio.sleep(self.ctx.set_reply_delay * 2)
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        with patch("websockets.broadcast", broadcast):
+            asyncio.run(run())
+
+    def test_set_notify_prefix(self) -> None:
+        """Ensure clients registered to a prefix are notified of every key starting with it."""
+        setter, setter_socket = connect(self.ctx, 0, 1)
+        tracker, tracker_socket = connect(self.ctx, 0, 2)
+        self.run_commands(
+            (tracker, {"cmd": "SetNotify", "keys": ["other"], "prefixes": ["tracker_"]}),
+            (setter, {"cmd": "Set", "key": "tracker_1", "operations": [{"operation": "replace", "value": 1}]}),
+            (setter, {"cmd": "Set", "key": "untracked", "operations": [{"operation": "replace", "value": 2}]}),
+            (setter, {"cmd": "SetMany", "sets": [
+                {"key": "tracker_2", "operations": [{"operation": "add", "value": 3}]},
+                {"key": "other", "operations": [{"operation": "add", "value": 4}]},
+            ]}),
+        )
+        self.assertEqual(self.ctx.stored_data, {"tracker_1": 1, "untracked": 2, "tracker_2": 3, "other": 4})
+        self.assertEqual([[(reply["key"], reply["value"]) for reply in message] for message in tracker_socket.sent],
+                         [[("tracker_1", 1)], [("tracker_2", 3)], [("other", 4)]])
+        self.assertEqual(setter_socket.sent, [])
+
+    def test_set_many_invalid(self) -> None:
+        """Ensure a SetMany with an invalid entry changes nothing."""
+        setter, setter_socket = connect(self.ctx, 0, 1)
+        self.run_commands((setter, {"cmd": "SetMany", "sets": [
+            {"key": "key", "operations": [{"operation": "replace", "value": 1}]},
+            {"key": "_read_race_mode", "operations": [{"operation": "replace", "value": 1}]},
+        ]}))
+        self.assertEqual(self.ctx.stored_data, {})
+        self.assertEqual([message[0]["cmd"] for message in setter_socket.sent], ["InvalidPacket"])
+
+        self.run_commands((setter, {"cmd": "SetMany", "sets": [
+            {"key": "key", "operations": [{"operation": "replace", "value": 1}]},
+            {"key": "other", "operations": [{"operation": "unknown", "value": 1}]},
+        ]}))
+        self.assertEqual(self.ctx.stored_data, {})
+
+    def test_set_many_failed_operation(self) -> None:
+        """Ensure an entry whose operation fails on the stored value is skipped, and the rest is applied and saved."""
+        setter, setter_socket = connect(self.ctx, 0, 1)
+        with patch.object(self.ctx, "save") as save:
+            self.run_commands((setter, {"cmd": "SetMany", "sets": [
+                {"key": "a", "want_reply": True, "operations": [{"operation": "replace", "value": 1}]},
+                {"key": "b", "operations": [{"operation": "add", "value": "text"}]},
+                {"key": "c", "operations": [{"operation": "replace", "value": 3}]},
+            ]}))
+        save.assert_called_once()
+        self.assertEqual(self.ctx.stored_data, {"a": 1, "c": 3})
+        replies = {reply["cmd"]: reply for message in setter_socket.sent for reply in message}
+        self.assertEqual(len(setter_socket.sent), 2)
+        self.assertEqual(replies["SetReply"]["key"], "a")
+        self.assertIn("b (TypeError)", replies["InvalidPacket"]["text"])
+
+    def test_delayed_set_reply(self) -> None:
+        """Ensure Sets within the delay are merged into one SetReply per key, and one message per client."""
+        self.ctx.set_reply_delay = 0.01
+        setter, setter_socket = connect(self.ctx, 0, 1)
+        tracker, tracker_socket = connect(self.ctx, 0, 2)
+        self.run_commands(
+            (tracker, {"cmd": "SetNotify", "keys": ["a", "b"]}),
+            *((setter, {"cmd": "Set", "key": key, "default": 10, "want_reply": key == "a",
+                        "operations": [{"operation": "add", "value": 1}]}) for key in ("a", "b", "a", "b")),
+        )
+        self.assertEqual(len(tracker_socket.sent), 1)
+        self.assertEqual([(reply["key"], reply["original_value"], reply["value"]) for reply in tracker_socket.sent[0]],
+                         [("a", 10, 12), ("b", 10, 12)])
+        # the setting client gets its own replies right away, each with its own original value
+        self.assertEqual([(reply["key"], reply["original_value"], reply["value"])
+                          for message in setter_socket.sent for reply in message],
+                         [("a", 10, 11), ("a", 11, 12)])
+
+    def test_delayed_set_reply_to_setter(self) -> None:
+        """Ensure a registered client doesn't get its own Set again, unless someone else changed the key after it."""
+        self.ctx.set_reply_delay = 0.01
+        setter, setter_socket = connect(self.ctx, 0, 1)
+        other, _ = connect(self.ctx, 0, 2)
+        self.run_commands(
+            (setter, {"cmd": "SetNotify", "keys": ["a", "b"]}),
+            (other, {"cmd": "Set", "key": "a", "operations": [{"operation": "add", "value": 1}]}),
+            (setter, {"cmd": "Set", "key": "a", "want_reply": True, "operations": [{"operation": "add", "value": 1}]}),
+            (setter, {"cmd": "Set", "key": "b", "want_reply": True, "operations": [{"operation": "add", "value": 1}]}),
+            (other, {"cmd": "Set", "key": "b", "operations": [{"operation": "add", "value": 1}]}),
+        )
+        self.assertEqual([[(reply["key"], reply["original_value"], reply["value"]) for reply in message]
+                          for message in setter_socket.sent],
+                         [[("a", 1, 2)], [("b", 0, 1)], [("b", 0, 2)]])
+
+
+class TestHints(unittest.TestCase):
+    def test_recheck_location_hints(self) -> None:
+        """Ensure checking a location updates the hints for it in every slot that has them, and nothing else."""
+        ctx = new_context()
+        found_hint = Hint(2, 1, 10, 100, False, status=HintStatus.HINT_PRIORITY)
+        other_hint = Hint(2, 1, 11, 101, False, status=HintStatus.HINT_PRIORITY)
+        for slot, hints in ((1, {found_hint, other_hint}), (2, {found_hint}), (3, {other_hint})):
+            ctx.hints[0, slot] = set(hints)
+            ctx.index_hints(0, slot, hints)
+
+        ctx.location_checks[0, 1] = {10}
+        changed: typing.Set[typing.Tuple[int, int]] = set()
+        ctx.recheck_location_hints(0, 1, {10}, changed)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        new_hint = found_hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(ctx.hints[0, 1], {new_hint, other_hint})
+        self.assertEqual(ctx.hints[0, 2], {new_hint})
+        self.assertEqual(ctx.hints[0, 3], {other_hint})
+        self.assertEqual([hint.status for hint in ctx.hints[0, 2]], [HintStatus.HINT_FOUND])
+
+
+class TestSpheres(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        ctx = new_context()
+        self.assertEqual(ctx.get_sphere(1, 1), -1)
+        self.assertEqual(ctx.get_spheres(1, [1, 2]), [-1, -1])
+
+        ctx.spheres = [{0: {-1}, 1: {1}}, {1: {2, 3}, 2: {1}}, {1: {3}}]
+        ctx.location_spheres = index_spheres(ctx.spheres)
+        self.assertEqual([ctx.get_sphere(1, location) for location in (1, 2, 3)], [0, 1, 1])
+        self.assertEqual(ctx.get_sphere(2, 1), 1)
+        self.assertEqual(ctx.get_spheres(1, [3, 1]), [1, 0])
+        self.assertRaises(KeyError, ctx.get_sphere, 2, 2)
+        self.assertRaises(KeyError, ctx.get_spheres, 3, [1])
+
+
+class TestDataPackage(unittest.TestCase):
+    def test_encoded_data_package(self) -> None:
+        """Ensure the DataPackage put together from cached game packages is what encoding it in one go gives."""
+        ctx = new_context()
+        gamespackage: typing.Dict[str, GamesPackage] = {
+            "Game": {"item_name_to_id": {"Item": 1}, "location_name_to_id": {"Location": 1}, "checksum": "1"},
+            "Gäme \"2\"": {"item_name_to_id": {}, "location_name_to_id": {"Location": 2}},
+        }
+        ctx.gamespackage = gamespackage
+        for games in (list(ctx.gamespackage), ["Game"], []):
+            expected = [{"cmd": "DataPackage", "data": {"games": {game: ctx.gamespackage[game] for game in games}}}]
+            for _ in range(2):
+                self.assertEqual(ctx.get_encoded_data_package(games), encode(expected))
@@ -0,0 +1,79 @@
+import json
+import typing
+import unittest
+from unittest.mock import patch
+
+from SNIClient import SNESState, SNIContext, max_ranges_per_read, merge_read_ranges, snes_read, \
+    snes_read_changes, snes_read_ranges
+
+
+class FakeSNISocket:
+    """Answers GetAddress requests from memory, in chunks like SNI does."""
+    open = True
+    closed = False
+
+    def __init__(self, ctx: SNIContext, memory: bytearray) -> None:
+        self.ctx = ctx
+        self.memory = memory
+        self.requests: typing.List[typing.List[str]] = []
+
+    async def send(self, message: str) -> None:
+        request = json.loads(message)
+        assert request["Opcode"] == "GetAddress"
+        operands = request["Operands"]
+        self.requests.append(operands)
+        data = b"".join(self.memory[int(address, 16):int(address, 16) + int(size, 16)]
+                        for address, size in zip(operands[::2], operands[1::2]))
+        for start in range(0, len(data), 3):
+            self.ctx.snes_recv_queue.put_nowait(data[start:start + 3])
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestSNIReads(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ctx = SNIContext("", "", "")
+        self.ctx.snes_state = SNESState.SNES_ATTACHED
+        self.memory = bytearray(range(256))
+        self.socket = FakeSNISocket(self.ctx, self.memory)
+        self.ctx.snes_socket = typing.cast(typing.Any, self.socket)
+
+    def test_merge_read_ranges(self) -> None:
+        self.assertEqual(merge_read_ranges([(10, 2), (0, 4), (4, 2), (2, 1), (11, 4), (20, 1)]),
+                         [(0, 6), (10, 5), (20, 1)])
+
+    async def test_read_ranges(self) -> None:
+        """Ensure each range gets its own bytes, while overlapping and adjacent ranges are requested together."""
+        ranges = [(0x10, 4), (0x12, 4), (0x16, 1), (0x80, 2), (0x40, 0), (0x11, 1)]
+        self.assertEqual(await snes_read_ranges(self.ctx, ranges),
+                         [bytes(self.memory[address:address + size]) for address, size in ranges])
+        self.assertEqual(self.socket.requests, [["10", "7", "80", "2"]])
+        self.assertEqual(await snes_read(self.ctx, 0x20, 3), bytes(self.memory[0x20:0x23]))
+
+        self.socket.requests.clear()
+        ranges = [(address, 1) for address in range(0, 4 * max_ranges_per_read, 2)]
+        self.assertEqual(await snes_read_ranges(self.ctx, ranges),
+                         [bytes(self.memory[address:address + 1]) for address, _ in ranges])
+        self.assertEqual(len(self.socket.requests), 2)
+
+    async def test_read_chunks(self) -> None:
+        """Ensure requests stay within SNES_READ_CHUNK_SIZE, even for ranges that are bigger."""
+        with patch("worlds.AutoSNIClient.SNES_READ_CHUNK_SIZE", 16):
+            ranges = [(0, 40), (50, 4), (30, 4)]
+            self.assertEqual(await snes_read_ranges(self.ctx, ranges),
+                             [bytes(self.memory[address:address + size]) for address, size in ranges])
+        self.assertEqual(self.socket.requests, [["0", "10"], ["10", "10"], ["20", "8", "32", "4"]])
+
+    async def test_read_changes(self) -> None:
+        ranges = [(0x10, 2), (0x20, 2)]
+        self.assertEqual(await snes_read_changes(self.ctx, ranges),
+                         {(0x10, 2): b"\x10\x11", (0x20, 2): b"\x20\x21"})
+        self.assertEqual(await snes_read_changes(self.ctx, ranges), {})
+        self.memory[0x21] = 0
+        self.assertEqual(await snes_read_changes(self.ctx, ranges), {(0x20, 2): b"\x20\x00"})
+
+    async def test_read_failure(self) -> None:
+        self.ctx.snes_state = SNESState.SNES_DISCONNECTED
+        self.assertIsNone(await snes_read_ranges(self.ctx, [(0, 1)]))
+        self.assertIsNone(await snes_read_changes(self.ctx, [(0, 1)]))
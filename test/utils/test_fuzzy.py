@@ -0,0 +1,32 @@
+# Tests for FuzzyMatcher and get_fuzzy_results in Utils.py
+
+import unittest
+
+from Utils import FuzzyMatcher, get_fuzzy_results, get_intended_text
+
+
+class TestFuzzyMatcher(unittest.TestCase):
+    words = ["Progressive Sword", "Progressive Shield", "progressive sword", "Sword", "Swords", "Master Sword",
+             "Bow", "Bows", "Silver Arrows", "Arrows (10)", "Hookshot", "Hammer", "Flute", "Ocarina", "ocarina",
+             "Éclair", "Eclair", "İce Rod", "Ice Rod", "Fire Rod", "Cane of Somaria", "Cane of Byrna", ""]
+    inputs = ["Progressive Sword", "progressive sword", "PROGRESSIVE SWORD", "Progresive Swrod", "sword", "word",
+              "Bow", "bows", "Arows", "Arrows 10", "Hookshto", "Ocarina", "Éclair", "eclair", "ice rod", "İce rod",
+              "Cane", "cane of", "xyz", "", "a"]
+
+    def test_same_ranking(self) -> None:
+        """Ensure the best matches are the same and in the same order as when ranking all words."""
+        matcher = FuzzyMatcher(self.words)
+        for input_word in self.inputs:
+            ranking = matcher.get_results(input_word)
+            self.assertEqual(len(ranking), len(self.words))
+            for limit in (1, 2, 3, 10):
+                with self.subTest(input_word=input_word, limit=limit):
+                    self.assertEqual(matcher.get_results(input_word, limit), ranking[:limit])
+                    self.assertEqual(get_fuzzy_results(input_word, self.words, limit), ranking[:limit])
+
+    def test_intended_text(self) -> None:
+        matcher = FuzzyMatcher(self.words)
+        self.assertEqual(get_intended_text("Progressive Sword", matcher), ("Progressive Sword", True, "Perfect Match"))
+        self.assertEqual(get_intended_text("hookshot", matcher),
+                         ("Hookshot", True, "Case Insensitive Perfect Match"))
+        self.assertEqual(get_intended_text("Hookshto", matcher), ("Hookshot", True, "Close Match"))
@@ -0,0 +1,39 @@
+import json
+import unittest
+
+from BaseClasses import CollectionState
+from Utils import GenerationProfiler
+from test.general import generate_test_multiworld
+
+
+class GenerationProfilerTest(unittest.TestCase):
+    def test_sections(self) -> None:
+        """Ensure sections accumulate per stage and game, and counts go to the innermost section."""
+        profiler = GenerationProfiler()
+        for _ in range(2):
+            with profiler.section("stage", "Game"):
+                profiler.count("counter")
+        with profiler.section("outer"):
+            profiler.count("counter", "Other Game")
+            with profiler.section("inner"):
+                profiler.count("counter")
+        profiler.count("counter")  # outside of any section
+
+        stages = json.loads(profiler.to_json(seed_name="seed"))["stages"]
+        self.assertEqual([(stage["stage"], stage["game"], stage["calls"], stage["counts"]) for stage in stages], [
+            ("stage", "Game", 2, {"counter": {"Game": 2}}),
+            ("inner", None, 1, {"counter": {"Archipelago": 1}}),
+            ("outer", None, 1, {"counter": {"Other Game": 1}}),
+        ])
+
+    def test_collection_state_counts(self) -> None:
+        """Ensure CollectionState counts its region updates and sweeps towards the multiworld's profiler."""
+        multiworld = generate_test_multiworld()
+        multiworld.profiler = GenerationProfiler()
+        with multiworld.profiler.section("test"):
+            state = CollectionState(multiworld)
+            state.sweep_for_advancements()
+            state.update_reachable_regions(1)
+        counts = multiworld.profiler.stages["test", None]["counts"]
+        self.assertEqual(counts["sweep_for_advancements"], {"Archipelago": 1})
+        self.assertGreaterEqual(counts["update_reachable_regions"][multiworld.game[1]], 1)
@@ -0,0 +1,42 @@
+import io
+import os
+import pickle
+import sys
+import unittest
+
+from WebHostLib.customserver import NameTable, StaticNameTables, write_name_tables
+
+
+class TestNameTables(unittest.TestCase):
+    def test_name_table(self) -> None:
+        """Ensure a NameTable reads back what was written, and behaves like the name lookups of a room's Context."""
+        file = io.BytesIO()
+        index = write_name_tables(file, {("item", "Game"): {3: "Item", -1: "Negative", 1 << 40: "Gäme Item"},
+                                         ("location", "Game"): {}})
+        buffer = memoryview(file.getbuffer())
+        items = NameTable(buffer, *index["item", "Game"], "Unknown item (ID:{})")
+        self.assertEqual(dict(items), {-1: "Negative", 3: "Item", 1 << 40: "Gäme Item"})
+        self.assertIn(3, items)
+        self.assertNotIn(2, items)
+        self.assertNotIn("Item", items)
+        self.assertEqual(items[2], "Unknown item (ID:2)")
+        self.assertIsNone(items.get(2))
+        self.assertEqual(len(NameTable(buffer, *index["location", "Game"], "")), 0)
+
+    def test_static_name_tables(self) -> None:
+        """Ensure static name tables can be sent to another process and read there."""
+        tables = pickle.loads(pickle.dumps(StaticNameTables.write({("location", "Game"): {1: "Location"}})))
+        self.assertEqual(dict(tables.get("location", "Game")), {1: "Location"})
+        self.assertEqual(tables.get("location", "Game")[2], "Unknown location (ID:2)")
+        self.assertIsNone(tables.get("item", "Game"))
+
+    @unittest.skipIf(sys.platform == "win32", "Windows does not allow removing a mapped file")
+    def test_remove(self) -> None:
+        """Ensure a process that mapped the tables can still read them after the launching process removed the file."""
+        tables = StaticNameTables.write({("item", "Game"): {1: "Item"}})
+        worker_tables = pickle.loads(pickle.dumps(tables))
+        worker_tables.open()
+        tables.remove()
+        tables.remove()
+        self.assertFalse(os.path.exists(tables.path))
+        self.assertEqual(dict(worker_tables.get("item", "Game")), {1: "Item"})
@@ -11,9 +11,9 @@ from typing import (Any, ClassVar, Dict, FrozenSet, List, Optional, Self, Set, T
                     TYPE_CHECKING, Type, Union)
 
 from Options import item_and_loc_options, ItemsAccessibility, OptionGroup, PerGameCommonOptions
-from BaseClasses import CollectionState, Entrance
+from BaseClasses import CollectionState, Entrance, ItemIndex
 from rule_builder.rules import CustomRuleRegister, Rule
-from Utils import Version
+from Utils import Version, profile_section
 
 if TYPE_CHECKING:
     from BaseClasses import CollectionRule, Item, Location, MultiWorld, Region, Tutorial
@@ -89,11 +89,14 @@ class AutoWorldRegister(type):
         new_class = super().__new__(mcs, name, bases, dct)
         new_class.__file__ = sys.modules[new_class.__module__].__file__
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
+            # checked as plain dict, so that registering a world does not import other worlds
+            if dict.__contains__(AutoWorldRegister.world_types, dct["game"]):
                 raise RuntimeError(f"""Game {dct["game"]} already registered in 
                 {AutoWorldRegister.world_types[dct["game"]].__file__} when attempting to register from
                 {new_class.__file__}.""")
             AutoWorldRegister.world_types[dct["game"]] = new_class
+            if new_class.compact_item_counts:
+                new_class.item_index = ItemIndex(new_class.item_name_to_id)
         if ".apworld" in new_class.__file__:
             new_class.zip_path = pathlib.Path(new_class.__file__).parents[1]
         if "settings_key" not in dct:
@@ -181,7 +184,8 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
     world = multiworld.worlds[player]
     method = getattr(world, method_name)
     try:
-        ret = _timed_call(method, *args, multiworld=multiworld, player=player)
+        with profile_section(multiworld.profiler, method_name, world.game):
+            ret = _timed_call(method, *args, multiworld=multiworld, player=player)
     except Exception as e:
         message = f"Exception in {method} for player {player}, named {multiworld.player_name[player]}."
         if sys.version_info >= (3, 11, 0):
@@ -198,10 +202,8 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
 
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
     for player in multiworld.player_ids:
         prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
         call_single(multiworld, method_name, player, *args)
         if __debug__:
             new_items = multiworld.itempool[prev_item_count:]
@@ -219,7 +221,8 @@ def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     for world_type in sorted(world_types, key=lambda world: world.__name__):
         stage_callable = getattr(world_type, f"stage_{method_name}", None)
         if stage_callable:
-            _timed_call(stage_callable, multiworld, *args)
+            with profile_section(multiworld.profiler, f"stage_{method_name}", world_type.game):
+                _timed_call(stage_callable, multiworld, *args)
 
 
 class WebWorld(metaclass=WebWorldRegister):
@@ -324,6 +327,20 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    compact_item_counts: ClassVar[bool] = False
+    """If True, CollectionState stores this world's item counts in an ItemCounts array instead of a Counter.
+    Copying states gets cheaper and rules can look up counts by index, see item_index. prog_items of this world then
+    only offers the Mapping API and total() of Counter."""
+
+    item_index: ClassVar[Optional[ItemIndex]] = None
+    """automatically generated dense indices of item names, if compact_item_counts is enabled"""
+
+    incremental_region_reachability: bool = False
+    """If True, a blocked entrance is only re-evaluated after an item its access rule depends on is collected,
+    see Entrance.get_item_dependencies. Entrances with unknown dependencies are still re-evaluated every time.
+    Only enable this if item counts are exclusively changed through CollectionState.add_item, remove_item and set_item
+    and no access rule depends on custom state that is changed in collect."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
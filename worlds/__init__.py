@@ -1,20 +1,23 @@
+import hashlib
 import importlib
 import importlib.abc
 import importlib.machinery
 import logging
 import os
 import sys
+import threading
 import zipimport
 import time
 import dataclasses
 import json
 from pathlib import Path
 from types import ModuleType
-from typing import List, Sequence
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from zipfile import BadZipFile
 
 from NetUtils import DataPackage
-from Utils import local_path, user_path, Version, version_tuple, tuplize_version, messagebox
+from Utils import cache_path, local_path, user_path, Version, version_tuple, tuplize_version, messagebox, \
+    restricted_loads
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -30,6 +33,7 @@ __all__ = [
     "local_folder",
     "user_folder",
     "failed_world_loads",
+    "load_all_worlds",
 ]
 
 
@@ -43,6 +47,7 @@ class WorldSource:
     relative: bool = True  # relative to regular world import folder
     time_taken: float = -1.0
     version: Version = Version(0, 0, 0)
+    attempted: bool = dataclasses.field(default=False, compare=False)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -53,7 +58,37 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def stamp(self) -> Tuple[int, int]:
+        """Modification time and size of the source's __init__ or zip, to tell if a world index entry is outdated."""
+        path = self.resolved_path
+        if not self.is_zip:
+            path = os.path.join(path, "__init__.py")
+            if not os.path.isfile(path):
+                path += "c"
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def files_hash(self) -> str:
+        """Hash over the path, modification time and size of every file of the source, to tell if data cached from
+        it is outdated."""
+        sha1 = hashlib.sha1()
+        path = self.resolved_path
+        if self.is_zip:
+            stat = os.stat(path)
+            sha1.update(f"{stat.st_mtime_ns} {stat.st_size}".encode())
+            return sha1.hexdigest()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(dirname for dirname in dirnames if dirname != "__pycache__")
+            for file in sorted(filenames):
+                file_path = os.path.join(dirpath, file)
+                stat = os.stat(file_path)
+                sha1.update(f"{os.path.relpath(file_path, path)} {stat.st_mtime_ns} {stat.st_size}\n".encode())
+        return sha1.hexdigest()
+
     def load(self) -> bool:
+        self.attempted = True
         try:
             start = time.perf_counter()
             importlib.import_module(f".{Path(self.path).stem}", "worlds")
@@ -91,121 +126,363 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
 world_sources.sort()
-apworlds: list[WorldSource] = []
-for world_source in world_sources:
-    # load all loose files first:
-    if world_source.is_zip:
-        apworlds.append(world_source)
-    else:
-        world_source.load()
 
 from .AutoWorld import AutoWorldRegister
 
-for world_source in world_sources:
-    if not world_source.is_zip:
-        # look for manifest
-        manifest = {}
-        for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
-            for file in filenames:
-                if file.endswith("archipelago.json"):
-                    with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
-                        manifest = json.load(manifest_file)
-                    break
-            if manifest:
+world_index_path = cache_path("world_index.json")
+data_package_cache_path = cache_path("data_package.pickle")
+# held while importing worlds, so other threads wait for the world types instead of seeing them half loaded
+world_load_lock = threading.RLock()
+loading_all_worlds = False
+all_worlds_loaded = False
+
+
+def load_world_version(world_source: WorldSource) -> None:
+    """Sets the world_version of a loaded folder world from its archipelago.json manifest."""
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
+        for file in filenames:
+            if file.endswith("archipelago.json"):
+                with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
+                    manifest = json.load(manifest_file)
                 break
-        game = manifest.get("game")
-        if game in AutoWorldRegister.world_types:
-            AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
-
-if apworlds:
-    # encapsulation for namespace / gc purposes
-    def load_apworlds() -> None:
-        global apworlds
-        from .Files import APWorldContainer, InvalidDataError
-        core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
-
-        def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
-            if add_as_failed_to_load:
-                failed_world_loads.append(game_name)
-            logging.warning(reason)
-
-        for apworld_source in apworlds:
-            apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
-            # populate metadata
-            try:
-                apworld.read()
-            except InvalidDataError as e:
-                if version_tuple < (0, 7, 0):
-                    logging.error(
-                        f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
-                        "This apworld will stop working with Archipelago 0.7.0."
-                    )
-                    logging.error(e)
-                else:
-                    raise e
-            except BadZipFile as e:
-                err_message = (f"The world source {apworld_source.resolved_path} is not a valid zip. "
-                               "It is likely either corrupted, or was packaged incorrectly.")
+        if manifest:
+            break
+    game = manifest.get("game")
+    if dict.__contains__(AutoWorldRegister.world_types, game):
+        AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
 
-                if sys.stdout:
-                    raise RuntimeError(err_message) from e
-                else:
-                    messagebox("Couldn't load worlds", err_message, error=True)
-                    sys.exit(1)
-
-            if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its minimum core version {apworld.minimum_ap_version} "
-                           f"is higher than current core version {version_tuple}.")
-            elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its maximum core version {apworld.maximum_ap_version} "
-                           f"is lower than current core version {version_tuple}.")
+
+def load_folder_world(world_source: WorldSource) -> None:
+    if not world_source.attempted:
+        world_source.load()
+        load_world_version(world_source)
+
+
+def load_apworlds(apworlds: List[WorldSource]) -> None:
+    from .Files import APWorldContainer, InvalidDataError
+    core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
+
+    def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
+        if add_as_failed_to_load:
+            failed_world_loads.append(game_name)
+        logging.warning(reason)
+
+    for apworld_source in apworlds:
+        apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
+        # populate metadata
+        try:
+            apworld.read()
+        except InvalidDataError as e:
+            if version_tuple < (0, 7, 0):
+                logging.error(
+                    f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
+                    "This apworld will stop working with Archipelago 0.7.0."
+                )
+                logging.error(e)
             else:
-                core_compatible.append((apworld_source, apworld))
-        # load highest version first
-        core_compatible.sort(
-            key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
-            reverse=True)
-
-        apworld_module_specs = {}
-        class APWorldModuleFinder(importlib.abc.MetaPathFinder):
-            def find_spec(
-                    self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
-            ) -> importlib.machinery.ModuleSpec | None:
-                return apworld_module_specs.get(fullname)
-
-        sys.meta_path.insert(0, APWorldModuleFinder())
-
-        for apworld_source, apworld in core_compatible:
-            if apworld.game and apworld.game in AutoWorldRegister.world_types:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its game {apworld.game} is already loaded.",
-                           add_as_failed_to_load=False)
+                raise e
+        except BadZipFile as e:
+            err_message = (f"The world source {apworld_source.resolved_path} is not a valid zip. "
+                           "It is likely either corrupted, or was packaged incorrectly.")
+
+            if sys.stdout:
+                raise RuntimeError(err_message) from e
             else:
-                importer = zipimport.zipimporter(apworld_source.resolved_path)
-                world_name = Path(apworld.path).stem
-
-                spec = importer.find_spec(f"worlds.{world_name}")
-                apworld_module_specs[f"worlds.{world_name}"] = spec
-
-                apworld_source.load()
-                if apworld.game in AutoWorldRegister.world_types:
-                    # world could fail to load at this point
-                    if apworld.world_version:
-                        AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
-    load_apworlds()
-    del load_apworlds
-
-del apworlds
-
-# Build the data package for each game.
-network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
-}
+                messagebox("Couldn't load worlds", err_message, error=True)
+                sys.exit(1)
+
+        if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
+            fail_world(apworld.game,
+                       f"Did not load {apworld_source.path} "
+                       f"as its minimum core version {apworld.minimum_ap_version} "
+                       f"is higher than current core version {version_tuple}.")
+        elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
+            fail_world(apworld.game,
+                       f"Did not load {apworld_source.path} "
+                       f"as its maximum core version {apworld.maximum_ap_version} "
+                       f"is lower than current core version {version_tuple}.")
+        else:
+            core_compatible.append((apworld_source, apworld))
+    # load highest version first
+    core_compatible.sort(
+        key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
+        reverse=True)
+
+    apworld_module_specs = {}
+    class APWorldModuleFinder(importlib.abc.MetaPathFinder):
+        def find_spec(
+                self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
+        ) -> importlib.machinery.ModuleSpec | None:
+            return apworld_module_specs.get(fullname)
+
+    sys.meta_path.insert(0, APWorldModuleFinder())
+
+    for apworld_source, apworld in core_compatible:
+        if apworld.game and dict.__contains__(AutoWorldRegister.world_types, apworld.game):
+            fail_world(apworld.game,
+                       f"Did not load {apworld_source.path} "
+                       f"as its game {apworld.game} is already loaded.",
+                       add_as_failed_to_load=False)
+        else:
+            importer = zipimport.zipimporter(apworld_source.resolved_path)
+            world_name = Path(apworld.path).stem
+
+            spec = importer.find_spec(f"worlds.{world_name}")
+            apworld_module_specs[f"worlds.{world_name}"] = spec
+
+            apworld_source.load()
+            if dict.__contains__(AutoWorldRegister.world_types, apworld.game):
+                # world could fail to load at this point
+                if apworld.world_version:
+                    AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
+
+
+def load_all_worlds() -> None:
+    """Imports all world sources that were not imported yet, folders first, then .apworlds."""
+    global loading_all_worlds, all_worlds_loaded
+    if all_worlds_loaded:
+        return
+    with world_load_lock:
+        if loading_all_worlds or all_worlds_loaded:
+            return
+        loading_all_worlds = True
+        try:
+            for world_source in world_sources:
+                if not world_source.is_zip:
+                    load_folder_world(world_source)
+            apworlds = [world_source for world_source in world_sources
+                        if world_source.is_zip and not world_source.attempted]
+            if apworlds:
+                load_apworlds(apworlds)
+            all_worlds_loaded = True
+        finally:
+            loading_all_worlds = False
+        write_world_index()
+
+
+def read_world_index() -> Tuple[Dict[str, WorldSource], Dict[str, str]]:
+    """Reads the world index written by the last load of all worlds.
+    Returns the folder world source of each game, and the settings class of each settings key,
+    for the sources that did not change since."""
+    games: Dict[str, WorldSource] = {}
+    settings: Dict[str, str] = {}
+    try:
+        with open(world_index_path, encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return games, settings
+    if index.get("version") != version_tuple.as_simple_string():
+        return games, settings
+    folder_sources = {world_source.resolved_path: world_source
+                      for world_source in world_sources if not world_source.is_zip}
+    for path, entry in index["sources"].items():
+        world_source = folder_sources.get(path)
+        try:
+            if not world_source or list(world_source.stamp) != entry["stamp"]:
+                continue
+        except OSError:
+            continue
+        games.update(dict.fromkeys(entry["games"], world_source))
+        settings.update(entry["settings"])
+    return games, settings
+
+
+def find_world_source(world_type: Any) -> Optional[WorldSource]:
+    """Returns the world source a world type was imported from, if any."""
+    module = world_type.__module__.split(".")
+    if module[0] != "worlds" or len(module) < 2:
+        return None  # registered from elsewhere, like tests
+    file = getattr(sys.modules.get(".".join(module[:2])), "__file__", None) or ""
+    for world_source in world_sources:
+        if world_source.attempted and file.startswith(world_source.resolved_path + os.sep):
+            return world_source
+    return None
+
+
+def write_world_index() -> None:
+    """Writes which folder world source provides which games and settings, for read_world_index."""
+    sources: Dict[str, Dict[str, Any]] = {}
+    for game, world_type in dict.items(AutoWorldRegister.world_types):
+        world_source = find_world_source(world_type)
+        if not world_source or world_source.is_zip:
+            continue  # .apworlds and worlds registered from elsewhere, like tests, are not indexed
+        try:
+            entry = sources.setdefault(world_source.resolved_path,
+                                       {"stamp": world_source.stamp, "games": [], "settings": {}})
+        except OSError:
+            continue
+        entry["games"].append(game)
+        annotation = world_type.__annotations__.get("settings", None)
+        if annotation is not None and annotation != "ClassVar[Optional['Group']]":
+            entry["settings"][world_type.settings_key] = f"{world_type.__module__}.{world_type.__name__}"
+    try:
+        os.makedirs(os.path.dirname(world_index_path), exist_ok=True)
+        with open(world_index_path + ".tmp", "w", encoding="utf-8") as index_file:
+            json.dump({"version": version_tuple.as_simple_string(), "sources": sources}, index_file)
+        os.replace(world_index_path + ".tmp", world_index_path)
+    except OSError as e:
+        logging.debug(f"Could not write world index: {e}")
+
+
+# core code that shapes every data package, like World.get_data_package_data and data_package_checksum
+data_package_core_sources = (os.path.join(local_folder, "AutoWorld.py"), local_path("NetUtils.py"))
+
+
+def get_core_sources_hash() -> str:
+    """Hash over the contents of data_package_core_sources, to tell if cached data packages are outdated
+    without a version bump. Sources that don't exist, like in frozen builds, only change with the version."""
+    sha1 = hashlib.sha1()
+    for path in data_package_core_sources:
+        try:
+            with open(path, "rb") as source_file:
+                sha1.update(source_file.read())
+        except OSError:
+            sha1.update(b"-")
+    return sha1.hexdigest()
+
+
+def read_data_package_cache() -> Dict[str, Any]:
+    """Reads the data packages written by write_data_package_cache in one go.
+    Returns an empty cache if there is none or it is from a different version or core code."""
+    try:
+        with open(data_package_cache_path, "rb") as cache_file:
+            cache = restricted_loads(cache_file.read())
+        if cache["version"] == version_tuple.as_simple_string() and cache["core"] == get_core_sources_hash():
+            return cache
+    except Exception:  # missing, corrupted or from an incompatible version
+        pass
+    return {"sources": {}, "games": {}}
+
+
+def write_data_package_cache(sources: Dict[str, Dict[str, Any]], games: Dict[str, Any]) -> None:
+    import pickle
+    try:
+        os.makedirs(os.path.dirname(data_package_cache_path), exist_ok=True)
+        with open(data_package_cache_path + ".tmp", "wb") as cache_file:
+            pickle.dump({"version": version_tuple.as_simple_string(), "core": get_core_sources_hash(),
+                         "sources": sources, "games": games},
+                        cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(data_package_cache_path + ".tmp", data_package_cache_path)
+    except OSError as e:
+        logging.debug(f"Could not write data package cache: {e}")
+
+
+def build_network_data_package() -> DataPackage:
+    """Builds the data package of all worlds.
+    The data package of each game, including its checksum, is taken from the cache if its world source did not change
+    since it was cached. If no world source changed, this does not import any worlds."""
+    cache = read_data_package_cache()
+    files_hashes: Dict[str, str] = {}
+    for world_source in world_sources:
+        try:
+            files_hashes[world_source.resolved_path] = world_source.files_hash
+        except OSError:
+            pass
+    unchanged = {path for path, entry in cache["sources"].items() if files_hashes.get(path) == entry["hash"]}
+    if unchanged.issuperset(world_source.resolved_path for world_source in world_sources):
+        return {"games": cache["games"]}
+
+    sources: Dict[str, Dict[str, Any]] = {}
+    games: Dict[str, Any] = {}
+    for game, world_type in AutoWorldRegister.world_types.items():
+        world_source = find_world_source(world_type)
+        path = world_source.resolved_path if world_source else None
+        if path in unchanged and game in cache["games"]:
+            games[game] = cache["games"][game]
+        else:
+            games[game] = world_type.get_data_package_data()
+        if path in files_hashes:
+            sources.setdefault(path, {"hash": files_hashes[path], "games": []})["games"].append(game)
+    # sources without any loaded game, like failed ones, are cached as such, to not load all worlds for them again
+    for world_source in world_sources:
+        if world_source.attempted and world_source.resolved_path in files_hashes:
+            sources.setdefault(world_source.resolved_path,
+                               {"hash": files_hashes[world_source.resolved_path], "games": []})
+    if any(path not in sources for path in files_hashes):
+        logging.debug("Not caching data packages, as not all world sources were loaded.")
+    else:
+        # cache only what comes from world sources, not worlds registered from elsewhere
+        sourced_games = {game for entry in sources.values() for game in entry["games"]}
+        write_data_package_cache(sources, {game: package for game, package in games.items() if game in sourced_games})
+    return {"games": games}
+
+
+indexed_games, indexed_settings = read_world_index()
+
+
+class LazyWorldTypes(dict):
+    """AutoWorldRegister.world_types, which imports world sources when they are needed.
+    Looking up a game imports only its source, if the world index knows it. Listing the world types, or looking up
+    a game the index does not know, imports all of them."""
+
+    def is_loaded(self, game: Any) -> bool:
+        """Checks for a game without importing anything."""
+        return dict.__contains__(self, game)
+
+    def load_game(self, game: str) -> None:
+        with world_load_lock:
+            world_source = indexed_games.get(game)
+            if world_source and not world_source.attempted:
+                load_folder_world(world_source)
+                # finish loading the worlds it imported, like load_all_worlds would
+                for other_source in world_sources:
+                    if not other_source.is_zip and not other_source.attempted and \
+                            f"worlds.{Path(other_source.path).stem}" in sys.modules:
+                        load_folder_world(other_source)
+            if not self.is_loaded(game):
+                load_all_worlds()
+
+    def __missing__(self, game: str) -> Any:
+        self.load_game(game)
+        if self.is_loaded(game):
+            return dict.__getitem__(self, game)
+        raise KeyError(game)
+
+    def __contains__(self, game: object) -> bool:
+        if not self.is_loaded(game) and isinstance(game, str):
+            self.load_game(game)
+        return self.is_loaded(game)
+
+    def get(self, game: str, default: Any = None) -> Any:
+        return self[game] if game in self else default
+
+    def __iter__(self) -> Any:
+        load_all_worlds()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        load_all_worlds()
+        return dict.__len__(self)
+
+    def keys(self) -> Any:
+        load_all_worlds()
+        return dict.keys(self)
+
+    def values(self) -> Any:
+        load_all_worlds()
+        return dict.values(self)
+
+    def items(self) -> Any:
+        load_all_worlds()
+        return dict.items(self)
+
+    def copy(self) -> "LazyWorldTypes":
+        return LazyWorldTypes(self.items())
+
+
+AutoWorldRegister.world_types = LazyWorldTypes(AutoWorldRegister.world_types)
+
+
+def __getattr__(name: str) -> Any:
+    if name == "network_data_package":
+        # Build the data package for each game.
+        global network_data_package
+        network_data_package = build_network_data_package()
+        return network_data_package
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+network_data_package: DataPackage
 